@@ -9,14 +9,6 @@ class Demographics(BaseModel):
     gender: str
 
 
-class LabResult(BaseModel):
-    itemid: int
-    charttime: datetime
-    value: str | None = None
-    valuenum: float | None = None
-    valueuom: str | None = None
-
-
 class DetailedLabResult(BaseModel):
     itemid: int
     test_name: str
@@ -49,32 +41,6 @@ class RadiologyReport(BaseModel):
     sequence_num: int | None = None
 
 
-class ChiefComplaint(BaseModel):
-    complaint: str
-
-
-class Diagnosis(BaseModel):
-    title: str
-
-
-class PastMedicalHistory(BaseModel):
-    note: str
-    category: str
-
-
-class PhysicalExam(BaseModel):
-    temporal_context: str | None = None
-    vital_signs: str | None = None
-    general: str | None = None
-    heent_neck: str | None = None
-    cardiovascular: str | None = None
-    pulmonary: str | None = None
-    abdominal: str | None = None
-    extremities: str | None = None
-    neurological: str | None = None
-    skin: str | None = None
-
-
 class Treatment(BaseModel):
     """Treatment/procedure information."""
 
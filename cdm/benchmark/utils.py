@@ -1,7 +1,9 @@
-import asyncio
 import json
+import mmap
+import re
 from pathlib import Path
 
+import orjson
 from loguru import logger
 
 from cdm.benchmark.data_models import BenchmarkDataset, HadmCase
@@ -12,39 +14,108 @@ def load_cases(benchmark_path: Path, num_cases: int = None) -> BenchmarkDataset:
 
     Args:
         benchmark_path: Path to the benchmark JSON file.
-        num_cases: Number of cases to load. If None, load all cases.
+        num_cases: Number of cases to load. If None, load all cases. A negative number
+            drops that many cases from the end.
 
     Returns:
         BenchmarkDataset Pydantic model
     """
     logger.info(f"Loading cases from {benchmark_path}")
 
-    with open(benchmark_path) as f:
-        data = json.load(f)
-
-    benchmark = BenchmarkDataset(**data)
-    if num_cases is not None:
-        benchmark = BenchmarkDataset(cases=benchmark.cases[:num_cases])
+    benchmark_path = Path(benchmark_path)
+    if num_cases is None or num_cases < 0 or benchmark_path.stat().st_size == 0:
+        # Parse and validate in a single pass inside pydantic-core. Negative num_cases
+        # need the whole file, and an empty file fails here with the usual validation error
+        benchmark = BenchmarkDataset.model_validate_json(benchmark_path.read_bytes())
+        if num_cases is not None:
+            benchmark = BenchmarkDataset(cases=benchmark.cases[:num_cases])
+    else:
+        # Only decode and validate the cases that are actually used
+        cases = _decode_first_cases(Path(benchmark_path), num_cases)
+        benchmark = BenchmarkDataset.model_validate({"cases": cases})
 
     logger.info(f"Loaded {len(benchmark.cases)} cases")
     return benchmark
 
 
-async def write_result_to_jsonl(file_path: Path, result: dict, lock: asyncio.Lock):
-    """Write a single result to JSONL file with async-safe locking.
+_CASES_ARRAY_START = re.compile(rb'\A\s*\{\s*"cases"\s*:\s*\[')
+_JSON_DECODER = json.JSONDecoder()
+_INITIAL_DECODE_WINDOW = 1 << 20
 
-    Args:
-        file_path: Path to JSONL output file
-        result: Dictionary to write as JSON line
-        lock: asyncio.Lock for thread-safe writing
-    """
-    async with lock:
 
-        def _write():
-            with file_path.open("a") as f:
-                f.write(json.dumps(result) + "\n")
+def _decode_first_cases(benchmark_path: Path, num_cases: int) -> list[dict]:
+    """Decode only the first num_cases entries of the benchmark's "cases" array.
+
+    The file is memory-mapped and only a growing prefix of it is decoded, so cases after
+    the first num_cases are neither read into memory nor turned into Python objects.
+    Falls back to decoding the whole file if it does not start with the "cases" array.
 
-        await asyncio.to_thread(_write)
+    Args:
+        benchmark_path: Path to the benchmark JSON file
+        num_cases: Number of cases to decode
+
+    Returns:
+        List of case dictionaries
+    """
+    with (
+        open(benchmark_path, "rb") as f,
+        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        match = _CASES_ARRAY_START.match(mm)
+        if match is None:
+            with memoryview(mm) as view:
+                return orjson.loads(view)["cases"][:num_cases]
+
+        cases = []
+        pos = match.end()  # The matched prefix is ASCII, so byte and str offsets agree
+        window = _INITIAL_DECODE_WINDOW
+        while True:
+            # Never cut the window inside a multi-byte UTF-8 character
+            end = min(window, len(mm))
+            while end < len(mm) and mm[end] & 0xC0 == 0x80:
+                end -= 1
+            text = mm[:end].decode()
+            try:
+                while len(cases) < num_cases:
+                    while text[pos] in " \t\n\r,":
+                        pos += 1
+                    if text[pos] == "]":
+                        break
+                    case, pos = _JSON_DECODER.raw_decode(text, pos)
+                    cases.append(case)
+                return cases
+            except (json.JSONDecodeError, IndexError):
+                # The next case extends past the decoded window
+                if end >= len(mm):
+                    raise
+                window *= 2
+
+
+class JsonlWriter:
+    """Append results to a JSONL file that stays open for the whole benchmark run."""
+
+    def __init__(self, file_path: Path):
+        """Open (and truncate) the output file.
+
+        Args:
+            file_path: Path to JSONL output file
+        """
+        self.file = Path(file_path).open("wb")
+
+    def write(self, result: dict) -> None:
+        """Write a single result as one JSON line and flush it to disk.
+
+        Args:
+            result: Dictionary to write as JSON line
+        """
+        self.file.write(
+            orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        )
+        self.file.flush()
+
+    def close(self) -> None:
+        """Close the output file."""
+        self.file.close()
 
 
 def add_clinical_history(case: HadmCase) -> dict:
@@ -71,7 +142,7 @@ def add_laboratory_tests(case: HadmCase) -> dict:
     Returns:
         dict: Dictionary with formatted laboratory results string.
     """
-    lab_results = ""
+    lab_lines = []
     for lab in case.lab_results:
         value = lab.value or "Unknown"
         ref_range_lower = lab.ref_range_lower
@@ -83,19 +154,18 @@ def add_laboratory_tests(case: HadmCase) -> dict:
             ref_str = f" (ref: {ref_range_lower}-{ref_range_upper})"
 
         # Format category and fluid info
-        category_str = ""
-        if lab.category or lab.fluid:
-            parts = []
-            if lab.category:
-                parts.append(lab.category)
-            if lab.fluid:
-                parts.append(lab.fluid)
-            category_str = f" [{' | '.join(parts)}]"
+        category = lab.category
+        fluid = lab.fluid
+        if category and fluid:
+            category_str = f" [{category} | {fluid}]"
+        elif category or fluid:
+            category_str = f" [{category or fluid}]"
+        else:
+            category_str = ""
 
-        lab_line = f"- {lab.test_name}{category_str}: {value}{ref_str}\n"
-        lab_results += lab_line
+        lab_lines.append(f"- {lab.test_name}{category_str}: {value}{ref_str}\n")
 
-    return {"laboratory_results": lab_results}
+    return {"laboratory_results": "".join(lab_lines)}
 
 
 def add_imaging_reports(case: HadmCase) -> dict:
@@ -107,17 +177,17 @@ def add_imaging_reports(case: HadmCase) -> dict:
     Returns:
         dict: Dictionary with formatted imaging reports string.
     """
-    imaging_results = ""
+    imaging_lines = []
     for imaging in case.radiology_reports:
         exam_name = imaging.exam_name or "Unknown"
         modality = imaging.modality or ""
         region = imaging.region or ""
         reports = imaging.text or "Unknown"
 
-        imaging_results += f"- {exam_name} ({modality}, {region})\n"
-        imaging_results += f"  Reports: {reports}\n\n"
+        imaging_lines.append(f"- {exam_name} ({modality}, {region})\n")
+        imaging_lines.append(f"  Reports: {reports}\n\n")
 
-    return {"imaging_reports": imaging_results}
+    return {"imaging_reports": "".join(imaging_lines)}
 
 
 def add_imaging_reports_abdomen_only(case: HadmCase) -> dict:
@@ -132,16 +202,16 @@ def add_imaging_reports_abdomen_only(case: HadmCase) -> dict:
     Returns:
         dict: Dictionary with formatted imaging reports string (abdomen only).
     """
-    imaging_results = ""
+    imaging_lines = []
     for imaging in case.radiology_reports:
         if imaging.region == "Abdomen":
             modality = imaging.modality or ""
             reports = imaging.text or "Unknown"
 
-            imaging_results += f"{modality} {imaging.region}\n"
-            imaging_results += f"{reports}\n\n"
+            imaging_lines.append(f"{modality} {imaging.region}\n")
+            imaging_lines.append(f"{reports}\n\n")
 
-    return {"imaging_reports": imaging_results.strip()}
+    return {"imaging_reports": "".join(imaging_lines).strip()}
 
 
 def add_microbiology_results(case: HadmCase) -> dict:
@@ -153,19 +223,19 @@ def add_microbiology_results(case: HadmCase) -> dict:
     Returns:
         dict: Dictionary with formatted microbiology results string.
     """
-    micro_results = ""
+    micro_lines = []
     for micro in case.microbiology_events:
         test_name = micro.test_name or "Unknown"
         spec_type = micro.spec_type_desc or ""
         organism = micro.organism_name or "Unknown"
         comments = micro.comments or ""
 
-        micro_results += f"- {test_name} ({spec_type})\n"
-        micro_results += f"  Organism: {organism}\n"
+        micro_lines.append(f"- {test_name} ({spec_type})\n")
+        micro_lines.append(f"  Organism: {organism}\n")
         if comments:
-            micro_results += f"  Comments: {comments}\n"
+            micro_lines.append(f"  Comments: {comments}\n")
 
-    return {"microbiology_results": micro_results}
+    return {"microbiology_results": "".join(micro_lines)}
 
 
 def gather_all_info(case: HadmCase) -> dict:
@@ -177,13 +247,12 @@ def gather_all_info(case: HadmCase) -> dict:
     Returns:
         dict: Dictionary with all formatted clinical information.
     """
-    info = {}
-    info.update(add_clinical_history(case))
-    info.update(add_laboratory_tests(case))
-    info.update(add_imaging_reports(case))
-    info.update(add_microbiology_results(case))
-
-    return info
+    return {
+        **add_clinical_history(case),
+        **add_laboratory_tests(case),
+        **add_imaging_reports(case),
+        **add_microbiology_results(case),
+    }
 
 
 def gather_all_info_abdomen_only(case: HadmCase) -> dict:
@@ -198,10 +267,9 @@ def gather_all_info_abdomen_only(case: HadmCase) -> dict:
     Returns:
         dict: Dictionary with all formatted clinical information (abdomen imaging only).
     """
-    info = {}
-    info.update(add_clinical_history(case))
-    info.update(add_laboratory_tests(case))
-    info.update(add_imaging_reports_abdomen_only(case))
-    info.update(add_microbiology_results(case))
-
-    return info
+    return {
+        **add_clinical_history(case),
+        **add_laboratory_tests(case),
+        **add_imaging_reports_abdomen_only(case),
+        **add_microbiology_results(case),
+    }
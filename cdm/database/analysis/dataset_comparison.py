@@ -12,432 +12,782 @@ Usage:
 """
 
 import argparse
+import copy
 import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+import orjson
+
+# Result fields that are summed over all found cases for the summary report
+_SUMMED_FIELDS = (
+    "history_similarity",
+    "exam_similarity",
+    "cdm_lab_count",
+    "new_lab_count",
+    "lab_missing",
+    "lab_extra",
+    "new_labs_have_itemid",
+    "itemid_overlap",
+    "lab_value_matches",
+    "lab_value_mismatches",
+    "radiology_match",
+    "new_radiology_have_note_id",
+    "radiology_exam_overlap",
+    "radiology_exam_missing",
+    "radiology_exam_extra",
+    "micro_match",
+    "new_micro_have_itemid",
+    "micro_organism_overlap",
+    "micro_organism_missing",
+    "micro_organism_extra",
+    "diagnosis_in_discharge",
+    "num_diagnoses",
+    "has_demographics",
+    "has_age",
+    "has_gender",
+    "cdm_procedures_count",
+    "new_treatments_count",
+    "procedures_exact_matches",
+    "procedures_partial_matches",
+)
+
+# Conditions for the cases listed in each section of the summary report
+_CASE_FILTERS = {
+    "low_history": lambda r: r.get("history_similarity", 0) < 0.8,
+    "low_exam": lambda r: r.get("exam_similarity", 0) < 0.8,
+    "missing_labs": lambda r: r.get("lab_missing", 0) > 0,
+    "extra_labs": lambda r: r.get("lab_extra", 0) > 0,
+    "lab_value_mismatch": lambda r: r.get("lab_value_mismatches", 0) > 0,
+    "radiology_count_mismatch": lambda r: not r.get("radiology_match", False),
+    "radiology_exam_missing": lambda r: r.get("radiology_exam_missing", 0) > 0,
+    "radiology_exam_extra": lambda r: r.get("radiology_exam_extra", 0) > 0,
+    "low_radiology_text": lambda r: r.get("radiology_text_similarity", 1.0) < 0.8,
+    "micro_count_mismatch": lambda r: not r.get("micro_match", False),
+    "micro_organism_missing": lambda r: r.get("micro_organism_missing", 0) > 0,
+    "micro_organism_extra": lambda r: r.get("micro_organism_extra", 0) > 0,
+    "diagnosis_not_found": lambda r: not r.get("diagnosis_in_discharge", False),
+    "missing_demographics": lambda r: not r.get("has_demographics", False),
+    "no_procedure_match": lambda r: (
+        r["procedures_partial_matches"] == 0 and r["cdm_procedures_count"] > 0
+    ),
+}
+
+# Diagnoses with one CDMv1 file each
+_CDM_V1_DIAGNOSES = ("pancreatitis", "appendicitis", "cholecystitis", "diverticulitis")
+
+# Number of flagged cases listed per section of the summary report. Only that many
+# are kept while aggregating, except for the sections that list every flagged case.
+_LISTED_CASES = 10
+_FULLY_LISTED_FILTERS = frozenset({"low_exam", "no_procedure_match"})
+
+
+# Datasets with fewer cases are compared without starting worker processes
+_MIN_PARALLEL_CASES = 16
+
+# CDMv1 cases of the running comparison, set in each worker process by _init_worker
+_worker_cdm_v1_data = None
+
+
+def _load_json(path):
+    """Read a JSON file with a single bulk read and decode it with orjson.
 
-def compare_datasets(new_dataset_path, cdm_v1_dir="/srv/student/cdm_v1", output_file=None):
+    Args:
+        path: Path to the JSON file
+
+    Returns:
+        Decoded JSON content
     """
-    Compare new dataset with original CDMv1 dataset files.
+    return orjson.loads(Path(path).read_bytes())
 
-    Text similarity is calculated using Jaccard similarity: the size of the intersection
-    divided by the size of the union of word sets (after lowercasing and basic tokenization).
+
+@lru_cache(maxsize=4096)
+def _word_set(text):
+    """Lowercase and split a text into its set of words.
+
+    Results are memoized by text content, so reports and notes that occur in several
+    cases are tokenized only once.
+
+    Args:
+        text: Free text to tokenize
+
+    Returns:
+        frozenset: Set of lowercased words
+    """
+    return frozenset(text.lower().split())
+
+
+def _normalize_micro_result(result):
+    """Normalize a microbiology result so that differently ordered lists compare equal.
+
+    Args:
+        result: Comma-separated organism names or comments
+
+    Returns:
+        str: Lowercased, sorted and re-joined result
+    """
+    result = result.lower()
+    if "," not in result:
+        # Single entry, nothing to sort
+        return result.strip()
+    return ", ".join(sorted(p.strip() for p in result.split(",")))
+
+
+def _prepare_cdm_case(cdm_case):
+    """Normalize the comparison keys of a CDMv1 case once.
+
+    The free-text word sets, radiology note IDs, modalities and regions, microbiology
+    results, discharge diagnosis and procedures are stored under underscore keys of a
+    shallow copy, so the loaded CDMv1 data itself is left unchanged.
+
+    Args:
+        cdm_case: CDMv1 case dictionary
+
+    Returns:
+        dict: Copy of the case with the normalized keys added
+    """
+    rad_reports = [
+        {**report, "_report_tokens": _word_set(report.get("Report", ""))}
+        for report in cdm_case.get("Radiology", [])
+    ]
+    cdm_case = {**cdm_case, "Radiology": rad_reports}
+    cdm_case["_history_tokens"] = _word_set(cdm_case.get("Patient History", ""))
+    cdm_case["_exam_tokens"] = _word_set(cdm_case.get("Physical Examination", ""))
+
+    cdm_case["_note_ids"] = frozenset(
+        str(r.get("Note ID", "")) for r in rad_reports if r.get("Note ID")
+    )
+    cdm_case["_modalities"] = frozenset(
+        r.get("Modality", "").strip().upper() for r in rad_reports if r.get("Modality")
+    )
+    cdm_case["_regions"] = frozenset(
+        r.get("Region", "").strip().lower() for r in rad_reports if r.get("Region")
+    )
+
+    micro_results = [v for v in cdm_case.get("Microbiology", {}).values() if v and v.strip()]
+    cdm_case["_micro_count"] = len(micro_results)
+    cdm_case["_micro_results"] = frozenset(_normalize_micro_result(v) for v in micro_results)
+
+    cdm_case["_diagnosis"] = _normalize_diagnosis(cdm_case.get("Discharge Diagnosis", ""), "___")
+
+    procedures = set()
+
+    # Collect from ICD9 titles
+    for proc in cdm_case.get("Procedures ICD9 Title", []):
+        if proc and proc.strip():
+            procedures.add(proc.strip().lower())
+
+    # Collect from ICD10 titles
+    for proc in cdm_case.get("Procedures ICD10 Title", []):
+        if proc and proc.strip():
+            procedures.add(proc.strip().lower())
+
+    # Collect from discharge procedures
+    discharge_procs = cdm_case.get("Procedures Discharge", [])
+    if isinstance(discharge_procs, str):
+        if discharge_procs.strip():
+            procedures.add(discharge_procs.strip().lower())
+    elif isinstance(discharge_procs, list):
+        for proc in discharge_procs:
+            if proc and proc.strip():
+                procedures.add(proc.strip().lower())
+
+    cdm_case["_procedures"] = frozenset(procedures)
+    return cdm_case
+
+
+def _text_similarity(cdm_tokens, new_text):
+    """Calculate the word overlap between a CDMv1 text and a new text.
+
+    The overlap is divided by the size of the larger of the two word sets. The new
+    text is only tokenized if the CDMv1 text has any words.
+
+    Args:
+        cdm_tokens: Word set of the CDMv1 text, as cached by _prepare_cdm_case
+        new_text: Text from the new dataset
+
+    Returns:
+        float | None: Similarity between 0 and 1, or None if either text has no words
+    """
+    if not cdm_tokens:
+        return None
+    new_tokens = _word_set(new_text)
+    if not new_tokens:
+        return None
+    return len(cdm_tokens & new_tokens) / max(len(cdm_tokens), len(new_tokens))
+
+
+@lru_cache(maxsize=4096)
+def _normalize_diagnosis(diagnosis, placeholder):
+    """Remove de-identification placeholders and normalize whitespace and case.
+
+    Results are memoized, since the same diagnoses recur across many cases.
+
+    Args:
+        diagnosis: Diagnosis text
+        placeholder: De-identification placeholder used in the text ("___" or "[REDACTED]")
+
+    Returns:
+        str: Normalized diagnosis
+    """
+    return " ".join(diagnosis.replace(placeholder, "").split()).lower()
+
+
+@lru_cache(maxsize=4096)
+def _parse_lab_value(value):
+    """Normalize a lab value and split it into its number and units.
+
+    Results are memoized by value, since the same lab values recur across many cases,
+    so each distinct text value pays for a failed float() only once.
+
+    Args:
+        value: Lab value as string
+
+    Returns:
+        tuple: (normalized value, leading number or None, tuple of unit tokens)
+    """
+    normalized = value.strip().lower()
+    parts = normalized.split()
+
+    if parts:
+        try:
+            return normalized, float(parts[0]), tuple(parts[1:])
+        except ValueError:
+            pass
+    return normalized, None, ()
+
+
+def _lab_values_match(cdm_value, new_value):
+    """Check whether a CDMv1 lab value and a new lab value agree.
+
+    Values whose first token is numeric are compared numerically, so formatting
+    differences like "10.0" vs "10" still match. Units are compared only if both
+    values have them. Other values are compared as normalized strings.
+
+    Args:
+        cdm_value: Lab value from CDMv1
+        new_value: Lab value from the new dataset
+
+    Returns:
+        bool: True if the values match
+    """
+    # Convert before the memoized parse, so that e.g. 1 and 1.0 are not one cache key
+    cdm_val_norm, cdm_num, cdm_units = _parse_lab_value(str(cdm_value))
+    new_val_norm, new_num, new_units = _parse_lab_value(str(new_value))
+
+    if cdm_num is not None and new_num is not None:
+        # Compare units only if both values have them
+        units_match = not cdm_units or not new_units or cdm_units == new_units
+        return abs(cdm_num - new_num) < 0.001 and units_match
+
+    # Not numeric, do string comparison
+    return cdm_val_norm == new_val_norm
+
+
+def _compare_case(case, cdm_v1_data):
+    """Compare a single case of the new dataset with its CDMv1 counterpart.
+
+    Args:
+        case: Case dictionary from the new dataset
+        cdm_v1_data: CDMv1 cases keyed by hadm_id
+
+    Returns:
+        dict: Comparison result for the case
+    """
+    hadm_id = str(case["hadm_id"])
+    ground_truth = case.get("ground_truth", {})
+    new_diagnoses = ground_truth.get("primary_diagnosis", [])
+
+    # Find matching case in CDMv1
+    cdm_case = cdm_v1_data.get(hadm_id)
+    comparison = {"hadm_id": hadm_id, "found": cdm_case is not None, "diagnosis": new_diagnoses}
+    if cdm_case is None:
+        return comparison
+
+    cdm_case = _prepare_cdm_case(cdm_case)
+
+    # 1. Patient History (text similarity)
+    similarity = _text_similarity(cdm_case["_history_tokens"], case.get("patient_history", ""))
+    comparison["history_similarity"] = round(similarity, 2) if similarity is not None else 0.0
+
+    # 2. Physical Exam (text similarity)
+    similarity = _text_similarity(cdm_case["_exam_tokens"], case.get("physical_exam_text", ""))
+    comparison["exam_similarity"] = round(similarity, 2) if similarity is not None else 0.0
+
+    # 3. Lab Tests (detailed comparison)
+    cdm_labs = cdm_case.get("Laboratory Tests", {})
+    new_labs_list = case.get("lab_results", [])
+
+    # Compare by itemids
+    # Index new labs by itemid, converting each itemid to str only once
+    new_labs_by_itemid = {}
+    new_labs_have_itemid = 0
+    for lab in new_labs_list:
+        if lab.get("itemid"):
+            new_labs_by_itemid[str(lab["itemid"])] = lab
+            new_labs_have_itemid += 1
+
+    cdm_itemids = set(cdm_labs.keys())
+    new_itemids = new_labs_by_itemid.keys()
+
+    comparison["cdm_lab_count"] = len(cdm_itemids)
+    comparison["new_lab_count"] = len(new_itemids)
+    missing_itemids = cdm_itemids - new_itemids
+    extra_itemids = new_itemids - cdm_itemids
+    comparison["lab_overlap"] = len(cdm_itemids & new_itemids)
+    comparison["lab_missing"] = len(missing_itemids)
+    comparison["lab_extra"] = len(extra_itemids)
+
+    # Store the actual missing/extra itemids for debugging
+    if missing_itemids:
+        comparison["lab_missing_itemids"] = list(missing_itemids)
+    if extra_itemids:
+        comparison["lab_extra_itemids"] = list(extra_itemids)
+
+    # Check if itemids are present
+    comparison["new_labs_have_itemid"] = new_labs_have_itemid
+
+    # Compare lab values for matching tests by itemid
+    lab_value_matches = 0
+    lab_value_mismatches = 0
+    lab_value_mismatch_details = []
+
+    for itemid, cdm_value in cdm_labs.items():
+        new_lab = new_labs_by_itemid.get(itemid)
+        if new_lab and new_lab.get("value"):
+            if _lab_values_match(cdm_value, new_lab["value"]):
+                lab_value_matches += 1
+            else:
+                lab_value_mismatches += 1
+                lab_value_mismatch_details.append(
+                    {
+                        "itemid": itemid,
+                        "cdm_value": cdm_value,
+                        "new_value": new_lab["value"],
+                    }
+                )
+
+    comparison["lab_value_matches"] = lab_value_matches
+    comparison["lab_value_mismatches"] = lab_value_mismatches
+    if lab_value_mismatch_details:
+        comparison["lab_value_mismatch_details"] = lab_value_mismatch_details
+
+    # 4. Radiology (detailed comparison)
+    cdm_rad_reports = cdm_case.get("Radiology", [])
+    new_rad_reports = case.get("radiology_reports", [])
+
+    comparison["cdm_radiology_count"] = len(cdm_rad_reports)
+    comparison["new_radiology_count"] = len(new_rad_reports)
+    comparison["radiology_match"] = len(cdm_rad_reports) == len(new_rad_reports)
+
+    # Scan new reports once: index them by note_id (converted to str only once) and
+    # collect their modalities and regions
+    new_reports_by_id = {}
+    new_rad_with_note_id = 0
+    new_modalities = set()
+    new_regions = set()
+    for new_report in new_rad_reports:
+        if new_report.get("note_id"):
+            new_reports_by_id[str(new_report["note_id"])] = new_report
+            new_rad_with_note_id += 1
+        if new_report.get("modality"):
+            new_modalities.add(new_report["modality"].strip().upper())
+        if new_report.get("region"):
+            new_regions.add(new_report["region"].strip().lower())
+
+    # Check for note_id field
+    comparison["new_radiology_have_note_id"] = new_rad_with_note_id
+
+    # Compare note IDs
+    cdm_exams = cdm_case["_note_ids"]
+    new_exams = new_reports_by_id.keys()
+
+    if cdm_exams or new_exams:
+        missing_exams = cdm_exams - new_exams
+        extra_exams = new_exams - cdm_exams
+        comparison["radiology_exam_overlap"] = len(cdm_exams & new_exams)
+        comparison["radiology_exam_missing"] = len(missing_exams)
+        comparison["radiology_exam_extra"] = len(extra_exams)
+        # Store the actual missing/extra exam names for debugging
+        if missing_exams:
+            comparison["radiology_missing_exams"] = list(missing_exams)
+        if extra_exams:
+            comparison["radiology_extra_exams"] = list(extra_exams)
+
+    # Compare modalities
+    cdm_modalities = cdm_case["_modalities"]
+
+    if cdm_modalities or new_modalities:
+        comparison["radiology_modality_overlap"] = len(cdm_modalities & new_modalities)
+
+    # Compare regions
+    cdm_regions = cdm_case["_regions"]
+
+    if cdm_regions or new_regions:
+        comparison["radiology_region_overlap"] = len(cdm_regions & new_regions)
+
+    # Compare text similarity
+    if cdm_rad_reports and new_rad_reports:
+        # Calculate text similarity for matching note_ids
+        text_similarities = []
+        for cdm_report in cdm_rad_reports:
+            cdm_note_id = str(cdm_report.get("Note ID", ""))
+            if cdm_note_id and cdm_note_id in new_reports_by_id:
+                similarity = _text_similarity(
+                    cdm_report["_report_tokens"], new_reports_by_id[cdm_note_id].get("text", "")
+                )
+                if similarity is not None:
+                    text_similarities.append(similarity)
+
+        if text_similarities:
+            comparison["radiology_text_similarity"] = round(
+                sum(text_similarities) / len(text_similarities), 2
+            )
+
+    # 5. Microbiology (detailed comparison)
+    new_micro_events = case.get("microbiology_events", [])
+
+    # Scan new events once: count non-empty results (check both organism_name and
+    # comments) and events with test_itemid, and collect the normalized results
+    new_micro_count = 0
+    new_micro_with_itemid = 0
+    new_results = set()
+    for event in new_micro_events:
+        org = event.get("organism_name", "")
+        comm = event.get("comments", "")
+        if org or comm:
+            new_micro_count += 1
+        if event.get("test_itemid"):
+            new_micro_with_itemid += 1
+
+        # Add both org_name and comments separately if they exist
+        if org and org.strip():
+            new_results.add(_normalize_micro_result(org))
+        if comm and comm.strip():
+            new_results.add(_normalize_micro_result(comm))
+
+    cdm_micro_count = cdm_case["_micro_count"]
+    comparison["cdm_micro_count"] = cdm_micro_count
+    comparison["new_micro_count"] = new_micro_count
+    comparison["micro_match"] = cdm_micro_count == new_micro_count
+
+    # Check for test_itemid field
+    comparison["new_micro_have_itemid"] = new_micro_with_itemid
+
+    # Compare results (organism names or comments)
+    # Results are split by comma, normalized and sorted to handle different ordering
+    cdm_results = cdm_case["_micro_results"]
+
+    if cdm_results or new_results:
+        # Calculate overlaps considering substring matches for comments (an exact match
+        # is a substring match too). Every pair is checked once, collecting the matched
+        # new results so the extra results need no second scan.
+        overlap_count = 0
+        missing_results = set()
+        matched_new_results = set()
+
+        for cdm_result in cdm_results:
+            found = False
+            for new_result in new_results:
+                if cdm_result in new_result or new_result in cdm_result:
+                    found = True
+                    matched_new_results.add(new_result)
+
+            if found:
+                overlap_count += 1
+            else:
+                missing_results.add(cdm_result)
+
+        extra_results = new_results - matched_new_results
+
+        comparison["micro_organism_overlap"] = overlap_count
+        comparison["micro_organism_missing"] = len(missing_results)
+        comparison["micro_organism_extra"] = len(extra_results)
+        # Store the actual missing/extra values for debugging
+        if missing_results:
+            comparison["micro_missing_values"] = list(missing_results)
+        if extra_results:
+            comparison["micro_extra_values"] = list(extra_results)
+
+    # 6. Diagnosis
+    cdm_diag_normalized = cdm_case["_diagnosis"]
+
+    # Check if any of the new diagnoses match the CDM diagnosis
+    diagnosis_match = False
+    if new_diagnoses:
+        for new_diag in new_diagnoses:
+            new_diag_normalized = _normalize_diagnosis(new_diag, "[REDACTED]")
+
+            if (
+                new_diag_normalized in cdm_diag_normalized
+                or cdm_diag_normalized in new_diag_normalized
+            ):
+                diagnosis_match = True
+                break
+
+    comparison["diagnosis_in_discharge"] = diagnosis_match
+
+    # Count diagnoses
+    comparison["num_diagnoses"] = len(new_diagnoses)
+
+    # 7. Demographics comparison
+    new_demo = case.get("demographics", {})
+    if new_demo:
+        comparison["has_demographics"] = True
+        comparison["has_age"] = "age" in new_demo and new_demo["age"] is not None
+        comparison["has_gender"] = "gender" in new_demo and new_demo["gender"] is not None
+    else:
+        comparison["has_demographics"] = False
+
+    # 8. Procedures/Treatments comparison
+    cdm_procedures = cdm_case["_procedures"]
+
+    new_treatments = set()
+    for treatment in ground_truth.get("treatments", []):
+        if treatment:
+            if isinstance(treatment, dict):
+                treatment_text = treatment.get("title", "")
+            else:
+                treatment_text = treatment
+            if treatment_text and treatment_text.strip():
+                new_treatments.add(treatment_text.strip().lower())
+
+    comparison["cdm_procedures_count"] = len(cdm_procedures)
+    comparison["new_treatments_count"] = len(new_treatments)
+
+    # Check for partial matches (procedures often have different wording)
+    exact_matches = 0
+    partial_matches = 0
+    if cdm_procedures and new_treatments:
+        exact_matches = len(cdm_procedures & new_treatments)
+        # One substring search over all treatments (joined with a separator that
+        # never occurs in the titles) replaces the inner loop for "cdm_proc in new_treat"
+        treatments_text = "\x00".join(new_treatments)
+        partial_matches = sum(
+            1
+            for cdm_proc in cdm_procedures
+            if cdm_proc in treatments_text
+            or any(new_treat in cdm_proc for new_treat in new_treatments)
+        )
+
+    comparison["procedures_exact_matches"] = exact_matches
+    comparison["procedures_partial_matches"] = partial_matches
+
+    return comparison
+
+
+def _render_cases(title, cases, count, format_case):
+    """Render a summary section that lists flagged cases.
+
+    Args:
+        title: Section title, followed by the number of flagged cases
+        cases: Flagged case results to list
+        count: Total number of flagged cases, including those that are not listed
+        format_case: Function formatting one case result as one or more lines
+
+    Returns:
+        str: Section text, ending with the number of cases that are not listed
+    """
+    lines = [f"\n  {title} ({count}):"]
+    lines.extend(format_case(r) for r in cases)
+    if count > len(cases):
+        lines.append(f"    ... and {count - len(cases)} more")
+    return "\n".join(lines)
+
+
+def _format_lab_value_mismatches(r):
+    """Format a case with lab value mismatches and its first 5 mismatching values.
+
+    Args:
+        r: Comparison result for the case
+
+    Returns:
+        str: Lines describing the mismatches
+    """
+    mismatch_details = r.get("lab_value_mismatch_details", [])
+    lines = [f"    - {r['hadm_id']} ({r.get('lab_value_mismatches', 0)} mismatches):"]
+    lines.extend(
+        f"      itemid {detail['itemid']}: CDMv1='{detail['cdm_value']}' vs New='{detail['new_value']}'"
+        for detail in mismatch_details[:5]  # Show first 5 mismatches
+    )
+    if len(mismatch_details) > 5:
+        lines.append(f"      ... and {len(mismatch_details) - 5} more")
+    return "\n".join(lines)
+
+
+def _init_worker(cdm_v1_data):
+    """Store the CDMv1 cases in a worker process so they are not sent with every task.
+
+    Args:
+        cdm_v1_data: CDMv1 cases keyed by hadm_id
+    """
+    global _worker_cdm_v1_data
+    _worker_cdm_v1_data = cdm_v1_data
+
+
+def _compare_case_in_worker(case):
+    """Compare a case against the CDMv1 cases stored by _init_worker.
+
+    Args:
+        case: Case dictionary from the new dataset
+
+    Returns:
+        dict: Comparison result for the case
+    """
+    return _compare_case(case, _worker_cdm_v1_data)
+
+
+def _cdm_v1_file(cdm_v1_dir, diagnosis):
+    """Return the path of the CDMv1 file for a diagnosis.
+
+    Args:
+        cdm_v1_dir: Directory containing CDMv1 files
+        diagnosis: Diagnosis the file contains cases for
+
+    Returns:
+        Path: Path to the CDMv1 JSON file
+    """
+    return Path(cdm_v1_dir) / f"{diagnosis}_hadm_info_first_diag.json"
+
+
+def _file_stamp(path):
+    """Return the modification time and size of a file.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        tuple | None: (mtime in ns, size in bytes), or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_cdm_v1_file(file_path):
+    """Load a CDMv1 file.
+
+    Parsed files are not kept after the comparison; unchanged inputs are instead
+    served by the memoized results of _run_comparison.
+
+    Args:
+        file_path: Path to the CDMv1 JSON file
+
+    Returns:
+        dict | None: CDMv1 cases keyed by hadm_id, or None if the file does not exist
+
+    Raises:
+        json.JSONDecodeError: If the file is malformed
+    """
+    try:
+        f = open(file_path, "rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        return orjson.loads(f.read())
+
+
+@lru_cache(maxsize=16)
+def _run_comparison(new_dataset_path, cdm_v1_dir, file_stamps, num_workers):
+    """Load the new dataset and the CDMv1 files and compare every case.
+
+    Results are memoized in-process by the input paths and file_stamps, so repeated
+    comparisons of unchanged files skip loading and comparing. Nothing is cached on
+    disk, because the results contain patient data.
 
     Args:
         new_dataset_path: Path to new benchmark_data.json
-        cdm_v1_dir: Directory containing CDMv1 files (pancreatitis, appendicitis, etc.)
-        output_file: Optional path to save summary report (default: auto-generated next to dataset)
+        cdm_v1_dir: Directory containing CDMv1 files
+        file_stamps: Stamps of the dataset and CDMv1 files (only used as cache key)
+        num_workers: Number of worker processes for the per-case comparison
 
     Returns:
-        dict: Comparison results with match statistics
+        tuple: Comparison result for each case
 
     Raises:
-        FileNotFoundError: If dataset or CDMv1 files are not found
-        json.JSONDecodeError: If JSON files are malformed
+        FileNotFoundError: If the dataset file is not found
+        json.JSONDecodeError: If the dataset file is malformed
     """
     # Load new dataset
     try:
-        with open(new_dataset_path) as f:
-            new_data = json.load(f)
+        new_data = _load_json(new_dataset_path)
     except FileNotFoundError as err:
         raise FileNotFoundError(f"Dataset file not found: {new_dataset_path}") from err
     except json.JSONDecodeError as e:
         raise json.JSONDecodeError(f"Invalid JSON in dataset file: {e.msg}", e.doc, e.pos) from e
 
-    # Load all CDMv1 dataset files
+    # Load all CDMv1 dataset files, keeping only the cases the new dataset refers to
+    # so the workers do not receive the whole CDMv1 cohort
+    wanted_ids = {str(case["hadm_id"]) for case in new_data["cases"]}
     cdm_v1_data = {}
-    for diagnosis in ["pancreatitis", "appendicitis", "cholecystitis", "diverticulitis"]:
-        file_path = Path(cdm_v1_dir) / f"{diagnosis}_hadm_info_first_diag.json"
-        if file_path.exists():
-            try:
-                with open(file_path) as f:
-                    cdm_v1_data.update(json.load(f))
-            except json.JSONDecodeError as e:
-                print(f"Warning: Invalid JSON in {file_path}: {e}")
-                continue
-
-    results = []
-
-    # Compare each case in new dataset
-    for case in new_data["cases"]:
-        hadm_id = str(case["hadm_id"])
-
-        # Find matching case in CDMv1
-        if hadm_id not in cdm_v1_data:
-            results.append(
-                {
-                    "hadm_id": hadm_id,
-                    "found": False,
-                    "diagnosis": case.get("ground_truth", {}).get("primary_diagnosis", []),
-                }
-            )
+    for diagnosis in _CDM_V1_DIAGNOSES:
+        file_path = _cdm_v1_file(cdm_v1_dir, diagnosis)
+        try:
+            cdm_cases = _load_cdm_v1_file(file_path)
+        except json.JSONDecodeError as e:
+            print(f"Warning: Invalid JSON in {file_path}: {e}")
             continue
+        if cdm_cases is not None:
+            cdm_v1_data.update(
+                (hadm_id, cdm_case)
+                for hadm_id, cdm_case in cdm_cases.items()
+                if hadm_id in wanted_ids
+            )
 
-        cdm_case = cdm_v1_data[hadm_id]
-
-        # Compare important fields
-        comparison = {
-            "hadm_id": hadm_id,
-            "found": True,
-            "diagnosis": case.get("ground_truth", {}).get("primary_diagnosis", []),
-        }
-
-        # 1. Patient History (text similarity)
-        cdm_history = cdm_case.get("Patient History", "").lower().split()
-        new_history = case.get("patient_history", "").lower().split()
-        if cdm_history and new_history:
-            overlap = len(set(cdm_history) & set(new_history))
-            similarity = overlap / max(len(set(cdm_history)), len(set(new_history)))
-            comparison["history_similarity"] = round(similarity, 2)
-        else:
-            comparison["history_similarity"] = 0.0
-
-        # 2. Physical Exam (text similarity)
-        cdm_exam = cdm_case.get("Physical Examination", "").lower().split()
-        new_exam = case.get("physical_exam_text", "").lower().split()
-        if cdm_exam and new_exam:
-            overlap = len(set(cdm_exam) & set(new_exam))
-            similarity = overlap / max(len(set(cdm_exam)), len(set(new_exam)))
-            comparison["exam_similarity"] = round(similarity, 2)
-        else:
-            comparison["exam_similarity"] = 0.0
-
-        # 3. Lab Tests (detailed comparison)
-        cdm_labs = cdm_case.get("Laboratory Tests", {})
-        new_labs_list = case.get("lab_results", [])
-
-        # Compare by itemids
-        cdm_itemids = set(cdm_labs.keys())
-        new_itemids = {str(lab["itemid"]) for lab in new_labs_list if lab.get("itemid")}
-
-        comparison["cdm_lab_count"] = len(cdm_itemids)
-        comparison["new_lab_count"] = len(new_itemids)
-        comparison["lab_overlap"] = len(cdm_itemids & new_itemids)
-        comparison["lab_missing"] = len(cdm_itemids - new_itemids)
-        comparison["lab_extra"] = len(new_itemids - cdm_itemids)
-
-        # Store the actual missing/extra itemids for debugging
-        if cdm_itemids - new_itemids:
-            comparison["lab_missing_itemids"] = list(cdm_itemids - new_itemids)
-        if new_itemids - cdm_itemids:
-            comparison["lab_extra_itemids"] = list(new_itemids - cdm_itemids)
-
-        # Check if itemids are present
-        new_labs_with_itemid = [lab for lab in new_labs_list if "itemid" in lab and lab["itemid"]]
-        comparison["new_labs_have_itemid"] = len(new_labs_with_itemid)
-
-        # Compare lab values for matching tests by itemid
-        lab_value_matches = 0
-        lab_value_mismatches = 0
-        lab_value_mismatch_details = []
-
-        # Create lookup for new labs by itemid
-        new_labs_by_itemid = {}
-        for lab in new_labs_list:
-            if lab.get("itemid"):
-                new_labs_by_itemid[str(lab["itemid"])] = lab
-
-        for itemid, cdm_value in cdm_labs.items():
-            new_lab = new_labs_by_itemid.get(itemid)
-            if new_lab and new_lab.get("value"):
-                # Normalize values for comparison
-                cdm_val_norm = str(cdm_value).strip().lower()
-                new_val_norm = str(new_lab["value"]).strip().lower()
-
-                # Try to parse as numeric to handle formatting differences like "10.0" vs "10"
-                try:
-                    cdm_num = float(cdm_val_norm.split()[0])
-                    new_num = float(new_val_norm.split()[0])
-                    # Also compare units if present
-                    cdm_parts = cdm_val_norm.split()
-                    new_parts = new_val_norm.split()
-                    units_match = (
-                        len(cdm_parts) == 1
-                        or len(new_parts) == 1
-                        or " ".join(cdm_parts[1:]) == " ".join(new_parts[1:])
-                    )
-                    if abs(cdm_num - new_num) < 0.001 and units_match:
-                        lab_value_matches += 1
-                    else:
-                        lab_value_mismatches += 1
-                        lab_value_mismatch_details.append(
-                            {
-                                "itemid": itemid,
-                                "cdm_value": cdm_value,
-                                "new_value": new_lab["value"],
-                            }
-                        )
-                except (ValueError, IndexError):
-                    # Not numeric, do string comparison
-                    if cdm_val_norm == new_val_norm:
-                        lab_value_matches += 1
-                    else:
-                        lab_value_mismatches += 1
-                        lab_value_mismatch_details.append(
-                            {
-                                "itemid": itemid,
-                                "cdm_value": cdm_value,
-                                "new_value": new_lab["value"],
-                            }
-                        )
-
-        comparison["lab_value_matches"] = lab_value_matches
-        comparison["lab_value_mismatches"] = lab_value_mismatches
-        if lab_value_mismatch_details:
-            comparison["lab_value_mismatch_details"] = lab_value_mismatch_details
-
-        # 4. Radiology (detailed comparison)
-        cdm_rad_reports = cdm_case.get("Radiology", [])
-        new_rad_reports = case.get("radiology_reports", [])
-
-        comparison["cdm_radiology_count"] = len(cdm_rad_reports)
-        comparison["new_radiology_count"] = len(new_rad_reports)
-        comparison["radiology_match"] = len(cdm_rad_reports) == len(new_rad_reports)
-
-        # Check for note_id field
-        new_rad_with_note_id = [r for r in new_rad_reports if "note_id" in r and r["note_id"]]
-        comparison["new_radiology_have_note_id"] = len(new_rad_with_note_id)
-
-        # Compare note IDs
-        cdm_exams = {str(r.get("Note ID", "")) for r in cdm_rad_reports if r.get("Note ID")}
-        new_exams = {str(r.get("note_id", "")) for r in new_rad_reports if r.get("note_id")}
-
-        if cdm_exams or new_exams:
-            comparison["radiology_exam_overlap"] = len(cdm_exams & new_exams)
-            comparison["radiology_exam_missing"] = len(cdm_exams - new_exams)
-            comparison["radiology_exam_extra"] = len(new_exams - cdm_exams)
-            # Store the actual missing/extra exam names for debugging
-            if cdm_exams - new_exams:
-                comparison["radiology_missing_exams"] = list(cdm_exams - new_exams)
-            if new_exams - cdm_exams:
-                comparison["radiology_extra_exams"] = list(new_exams - cdm_exams)
-
-        # Compare modalities
-        cdm_modalities = {
-            r.get("Modality", "").strip().upper() for r in cdm_rad_reports if r.get("Modality")
-        }
-        new_modalities = {
-            r.get("modality", "").strip().upper() for r in new_rad_reports if r.get("modality")
-        }
-
-        if cdm_modalities or new_modalities:
-            comparison["radiology_modality_overlap"] = len(cdm_modalities & new_modalities)
-
-        # Compare regions
-        cdm_regions = {
-            r.get("Region", "").strip().lower() for r in cdm_rad_reports if r.get("Region")
-        }
-        new_regions = {
-            r.get("region", "").strip().lower() for r in new_rad_reports if r.get("region")
-        }
-
-        if cdm_regions or new_regions:
-            comparison["radiology_region_overlap"] = len(cdm_regions & new_regions)
-
-        # Compare text similarity
-        if cdm_rad_reports and new_rad_reports:
-            # Create lookup for new reports by note_id
-            new_reports_by_id = {}
-            for new_report in new_rad_reports:
-                if new_report.get("note_id"):
-                    new_reports_by_id[str(new_report["note_id"])] = new_report
-
-            # Calculate text similarity for matching note_ids
-            text_similarities = []
-            for cdm_report in cdm_rad_reports:
-                cdm_note_id = str(cdm_report.get("Note ID", ""))
-                if cdm_note_id and cdm_note_id in new_reports_by_id:
-                    cdm_text = cdm_report.get("Report", "").lower().split()
-                    new_text = new_reports_by_id[cdm_note_id].get("text", "").lower().split()
-                    if cdm_text and new_text:
-                        overlap = len(set(cdm_text) & set(new_text))
-                        similarity = overlap / max(len(set(cdm_text)), len(set(new_text)))
-                        text_similarities.append(similarity)
-
-            if text_similarities:
-                comparison["radiology_text_similarity"] = round(
-                    sum(text_similarities) / len(text_similarities), 2
-                )
+    # Compare each case in new dataset. Cases are independent, so they are spread
+    # over worker processes that each receive the CDMv1 data once. Small datasets are
+    # compared in this process, where starting workers would cost more than it saves.
+    cases = new_data["cases"]
+    if num_workers == 1 or len(cases) < _MIN_PARALLEL_CASES:
+        return tuple(_compare_case(case, cdm_v1_data) for case in cases)
 
-        # 5. Microbiology (detailed comparison)
-        cdm_micro = cdm_case.get("Microbiology", {})
-        new_micro_events = case.get("microbiology_events", [])
+    with ProcessPoolExecutor(
+        max_workers=num_workers, initializer=_init_worker, initargs=(cdm_v1_data,)
+    ) as executor:
+        return tuple(executor.map(_compare_case_in_worker, cases, chunksize=64))
 
-        # Count non-empty results (check both organism_name and comments)
-        cdm_micro_count = sum(1 for v in cdm_micro.values() if v and v.strip())
-        new_micro_count = len(
-            [e for e in new_micro_events if e.get("organism_name") or e.get("comments")]
-        )
 
-        comparison["cdm_micro_count"] = cdm_micro_count
-        comparison["new_micro_count"] = new_micro_count
-        comparison["micro_match"] = cdm_micro_count == new_micro_count
-
-        # Check for test_itemid field
-        new_micro_with_itemid = [
-            e for e in new_micro_events if "test_itemid" in e and e["test_itemid"]
-        ]
-        comparison["new_micro_have_itemid"] = len(new_micro_with_itemid)
-
-        # Compare results (organism names or comments)
-        cdm_results = set()
-        for result in cdm_micro.values():
-            if result and result.strip():
-                # Split by comma, normalize and sort to handle different ordering
-                parts = [p.strip().lower() for p in result.split(",")]
-                normalized = ", ".join(sorted(parts))
-                cdm_results.add(normalized)
-
-        new_results = set()
-        for event in new_micro_events:
-            # Use organism_name if available, otherwise use comments
-            org = event.get("organism_name", "")
-            comm = event.get("comments", "")
-
-            # Add both org_name and comments separately if they exist
-            if org and org.strip():
-                parts = [p.strip().lower() for p in org.split(",")]
-                normalized = ", ".join(sorted(parts))
-                new_results.add(normalized)
-            if comm and comm.strip():
-                parts = [p.strip().lower() for p in comm.split(",")]
-                normalized = ", ".join(sorted(parts))
-                new_results.add(normalized)
-
-        if cdm_results or new_results:
-            # Calculate overlaps considering substring matches for comments
-            overlap_count = 0
-            missing_results = set()
-
-            for cdm_result in cdm_results:
-                found = False
-                # Check exact match first
-                if cdm_result in new_results:
-                    overlap_count += 1
-                    found = True
-                else:
-                    # Check if CDM result is contained in any new result (for comments)
-                    for new_result in new_results:
-                        if cdm_result in new_result or new_result in cdm_result:
-                            overlap_count += 1
-                            found = True
-                            break
-
-                if not found:
-                    missing_results.add(cdm_result)
-
-            # Calculate extra results
-            extra_results = set()
-            for new_result in new_results:
-                found = False
-                for cdm_result in cdm_results:
-                    if (
-                        new_result == cdm_result
-                        or cdm_result in new_result
-                        or new_result in cdm_result
-                    ):
-                        found = True
-                        break
-                if not found:
-                    extra_results.add(new_result)
-
-            comparison["micro_organism_overlap"] = overlap_count
-            comparison["micro_organism_missing"] = len(missing_results)
-            comparison["micro_organism_extra"] = len(extra_results)
-            # Store the actual missing/extra values for debugging
-            if missing_results:
-                comparison["micro_missing_values"] = list(missing_results)
-            if extra_results:
-                comparison["micro_extra_values"] = list(extra_results)
-            if new_results - cdm_results:
-                comparison["micro_extra_values"] = list(new_results - cdm_results)
-
-        # 6. Diagnosis
-        cdm_diag = cdm_case.get("Discharge Diagnosis", "")
-        new_diagnoses = case.get("ground_truth", {}).get("primary_diagnosis", [])
-
-        # Normalize CDM diagnosis
-        cdm_diag_normalized = cdm_diag.replace("___", "")
-        cdm_diag_normalized = " ".join(cdm_diag_normalized.split()).strip().lower()
-
-        # Check if any of the new diagnoses match the CDM diagnosis
-        diagnosis_match = False
-        if new_diagnoses:
-            for new_diag in new_diagnoses:
-                new_diag_normalized = new_diag.replace("[REDACTED]", "")
-                new_diag_normalized = " ".join(new_diag_normalized.split()).strip().lower()
-
-                if (
-                    new_diag_normalized in cdm_diag_normalized
-                    or cdm_diag_normalized in new_diag_normalized
-                ):
-                    diagnosis_match = True
-                    break
-
-        comparison["diagnosis_in_discharge"] = diagnosis_match
-
-        # Count diagnoses
-        comparison["num_diagnoses"] = len(new_diagnoses)
-
-        # 7. Demographics comparison
-        new_demo = case.get("demographics", {})
-        if new_demo:
-            comparison["has_demographics"] = True
-            comparison["has_age"] = "age" in new_demo and new_demo["age"] is not None
-            comparison["has_gender"] = "gender" in new_demo and new_demo["gender"] is not None
-        else:
-            comparison["has_demographics"] = False
-
-        # 8. Procedures/Treatments comparison
-        cdm_procedures = set()
-
-        # Collect from ICD9 titles
-        for proc in cdm_case.get("Procedures ICD9 Title", []):
-            if proc and proc.strip():
-                cdm_procedures.add(proc.strip().lower())
+def compare_datasets(
+    new_dataset_path, cdm_v1_dir="/srv/student/cdm_v1", output_file=None, num_workers=1
+):
+    """
+    Compare new dataset with original CDMv1 dataset files.
 
-        # Collect from ICD10 titles
-        for proc in cdm_case.get("Procedures ICD10 Title", []):
-            if proc and proc.strip():
-                cdm_procedures.add(proc.strip().lower())
-
-        # Collect from discharge procedures
-        discharge_procs = cdm_case.get("Procedures Discharge", [])
-        if isinstance(discharge_procs, str):
-            if discharge_procs.strip():
-                cdm_procedures.add(discharge_procs.strip().lower())
-        elif isinstance(discharge_procs, list):
-            for proc in discharge_procs:
-                if proc and proc.strip():
-                    cdm_procedures.add(proc.strip().lower())
-
-        new_treatments = set()
-        for treatment in case.get("ground_truth", {}).get("treatments", []):
-            if treatment:
-                if isinstance(treatment, dict):
-                    treatment_text = treatment.get("title", "")
-                else:
-                    treatment_text = treatment
-                if treatment_text and treatment_text.strip():
-                    new_treatments.add(treatment_text.strip().lower())
-
-        comparison["cdm_procedures_count"] = len(cdm_procedures)
-        comparison["new_treatments_count"] = len(new_treatments)
-
-        # Check for partial matches (procedures often have different wording)
-        if cdm_procedures and new_treatments:
-            exact_matches = len(cdm_procedures & new_treatments)
-            partial_matches = 0
-            for cdm_proc in cdm_procedures:
-                for new_treat in new_treatments:
-                    if cdm_proc in new_treat or new_treat in cdm_proc:
-                        partial_matches += 1
-                        break
-
-            comparison["procedures_exact_matches"] = exact_matches
-            comparison["procedures_partial_matches"] = partial_matches
-
-        results.append(comparison)
+    Text similarity is calculated using Jaccard similarity: the size of the intersection
+    divided by the size of the union of word sets (after lowercasing and basic tokenization).
+    Comparison results are memoized in-process, so calling this again with unchanged
+    input files only regenerates the summary report.
+
+    Args:
+        new_dataset_path: Path to new benchmark_data.json
+        cdm_v1_dir: Directory containing CDMv1 files (pancreatitis, appendicitis, etc.)
+        output_file: Optional path to save summary report (default: auto-generated next to dataset)
+        num_workers: Number of worker processes for the per-case comparison (default: 1;
+            None uses the CPU count). With 1, or fewer than 16 cases, cases are compared in
+            this process.
+
+    Returns:
+        dict: Comparison results with match statistics
+
+    Raises:
+        FileNotFoundError: If dataset or CDMv1 files are not found
+        json.JSONDecodeError: If JSON files are malformed
+    """
+    # Stamp every input file, so unchanged inputs reuse the results of an earlier call
+    file_stamps = (_file_stamp(new_dataset_path),) + tuple(
+        _file_stamp(_cdm_v1_file(cdm_v1_dir, diagnosis)) for diagnosis in _CDM_V1_DIAGNOSES
+    )
+    # Deep-copy the memoized results so callers can modify them, including their nested
+    # lists and dicts, without affecting the cache
+    results = copy.deepcopy(
+        list(_run_comparison(str(new_dataset_path), str(cdm_v1_dir), file_stamps, num_workers))
+    )
 
     # Generate output file path if not provided
     if output_file is None:
@@ -452,7 +802,6 @@ def compare_datasets(new_dataset_path, cdm_v1_dir="/srv/student/cdm_v1", output_
 
     def add_line(line=""):
         summary_lines.append(line)
-        print(line)
 
     # Print and collect summary
     add_line(f"\n{'=' * 80}")
@@ -461,323 +810,225 @@ def compare_datasets(new_dataset_path, cdm_v1_dir="/srv/student/cdm_v1", output_
 
     found_cases = [r for r in results if r["found"]]
     not_found_ids = [r["hadm_id"] for r in results if not r["found"]]
+    num_found = len(found_cases)
 
     add_line(f"Total cases in new dataset: {len(results)}")
-    add_line(f"Found in CDMv1: {len(found_cases)}")
-    add_line(f"Not found in CDMv1: {len(results) - len(found_cases)}")
+    add_line(f"Found in CDMv1: {num_found}")
+    add_line(f"Not found in CDMv1: {len(results) - num_found}")
 
     if not_found_ids:
         add_line("\nCases not found in CDMv1:")
         for hadm_id in not_found_ids:
             add_line(f"  - {hadm_id}")
 
-    if found_cases:
+    if num_found:
+        # Accumulate every total and collect the flagged cases in a single pass
+        totals = dict.fromkeys(_SUMMED_FIELDS, 0)
+        flagged = {name: [] for name in _CASE_FILTERS}
+        flagged_counts = dict.fromkeys(_CASE_FILTERS, 0)
+        text_sim_sum = 0.0
+        text_sim_count = 0
+        for r in found_cases:
+            for key in _SUMMED_FIELDS:
+                totals[key] += r.get(key, 0)
+            for name, condition in _CASE_FILTERS.items():
+                if condition(r):
+                    flagged_counts[name] += 1
+                    cases = flagged[name]
+                    if len(cases) < _LISTED_CASES or name in _FULLY_LISTED_FILTERS:
+                        cases.append(r)
+            if "radiology_text_similarity" in r:
+                text_sim_sum += r["radiology_text_similarity"]
+                text_sim_count += 1
+
+        def add_cases(name, title, format_case):
+            # Add the section listing the cases flagged by one filter, if any
+            if flagged_counts[name]:
+                add_line(_render_cases(title, flagged[name], flagged_counts[name], format_case))
+
         add_line("\nAverage similarities (for found cases):")
-        avg_history = sum(r.get("history_similarity", 0) for r in found_cases) / len(found_cases)
-        avg_exam = sum(r.get("exam_similarity", 0) for r in found_cases) / len(found_cases)
+        avg_history = totals["history_similarity"] / num_found
+        avg_exam = totals["exam_similarity"] / num_found
         add_line(f"  History text:     {avg_history:.1%}")
         add_line(f"  Physical exam:    {avg_exam:.1%}")
 
-        # Collect cases with low similarity
-        low_history = [r["hadm_id"] for r in found_cases if r.get("history_similarity", 0) < 0.8]
-        low_exam = [r["hadm_id"] for r in found_cases if r.get("exam_similarity", 0) < 0.8]
-
-        if low_history:
-            add_line(f"\n  Cases with history similarity < 80% ({len(low_history)}):")
-            for hadm_id in low_history[:10]:  # Show first 10
-                sim = next(
-                    r.get("history_similarity", 0) for r in found_cases if r["hadm_id"] == hadm_id
-                )
-                add_line(f"    - {hadm_id} ({sim:.1%})")
-            if len(low_history) > 10:
-                add_line(f"    ... and {len(low_history) - 10} more")
-
-        if low_exam:
-            add_line(f"\n  Cases with exam similarity < 80% ({len(low_exam)}):")
-            for hadm_id in low_exam:
-                sim = next(
-                    r.get("exam_similarity", 0) for r in found_cases if r["hadm_id"] == hadm_id
-                )
-                add_line(f"    - {hadm_id} ({sim:.1%})")
-
+        add_cases(
+            "low_history",
+            "Cases with history similarity < 80%",
+            lambda r: f"    - {r['hadm_id']} ({r.get('history_similarity', 0):.1%})",
+        )
+        add_cases(
+            "low_exam",
+            "Cases with exam similarity < 80%",
+            lambda r: f"    - {r['hadm_id']} ({r.get('exam_similarity', 0):.1%})",
+        )
         add_line("\nLab tests:")
-        avg_cdm_labs = sum(r.get("cdm_lab_count", 0) for r in found_cases) / len(found_cases)
-        avg_new_labs = sum(r.get("new_lab_count", 0) for r in found_cases) / len(found_cases)
-        total_missing = sum(r.get("lab_missing", 0) for r in found_cases)
-        total_extra = sum(r.get("lab_extra", 0) for r in found_cases)
-        total_with_itemid = sum(r.get("new_labs_have_itemid", 0) for r in found_cases)
-        total_itemid_overlap = sum(r.get("itemid_overlap", 0) for r in found_cases)
-        total_value_matches = sum(r.get("lab_value_matches", 0) for r in found_cases)
-        total_value_mismatches = sum(r.get("lab_value_mismatches", 0) for r in found_cases)
+        avg_cdm_labs = totals["cdm_lab_count"] / num_found
+        avg_new_labs = totals["new_lab_count"] / num_found
 
         add_line(f"  Avg CDMv1 tests per case:  {avg_cdm_labs:.1f}")
         add_line(f"  Avg new tests per case:    {avg_new_labs:.1f}")
-        add_line(f"  Total missing:             {total_missing}")
-        add_line(f"  Total extra:               {total_extra}")
-        add_line(f"  Labs with itemid:          {total_with_itemid}")
-        add_line(f"  ItemID overlap:            {total_itemid_overlap}")
-        add_line(f"  Value matches:             {total_value_matches}")
-        add_line(f"  Value mismatches:          {total_value_mismatches}")
-
-        # Cases with missing labs
-        cases_with_missing_labs = [r["hadm_id"] for r in found_cases if r.get("lab_missing", 0) > 0]
-        if cases_with_missing_labs:
-            add_line(f"\n  Cases with missing lab tests ({len(cases_with_missing_labs)}):")
-            for hadm_id in cases_with_missing_labs[:10]:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                missing = r.get("lab_missing", 0)
-                missing_itemids = r.get("lab_missing_itemids", [])
-                add_line(f"    - {hadm_id} ({missing} missing): itemids {missing_itemids}")
-            if len(cases_with_missing_labs) > 10:
-                add_line(f"    ... and {len(cases_with_missing_labs) - 10} more")
-
-        # Cases with extra labs
-        cases_with_extra_labs = [r["hadm_id"] for r in found_cases if r.get("lab_extra", 0) > 0]
-        if cases_with_extra_labs:
-            add_line(f"\n  Cases with extra lab tests ({len(cases_with_extra_labs)}):")
-            for hadm_id in cases_with_extra_labs[:10]:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                extra = r.get("lab_extra", 0)
-                extra_itemids = r.get("lab_extra_itemids", [])
-                add_line(f"    - {hadm_id} ({extra} extra): itemids {extra_itemids}")
-            if len(cases_with_extra_labs) > 10:
-                add_line(f"    ... and {len(cases_with_extra_labs) - 10} more")
-
-        # Cases with value mismatches
-        cases_with_value_mismatch = [
-            r["hadm_id"] for r in found_cases if r.get("lab_value_mismatches", 0) > 0
-        ]
-        if cases_with_value_mismatch:
-            add_line(f"\n  Cases with lab value mismatches ({len(cases_with_value_mismatch)}):")
-            for hadm_id in cases_with_value_mismatch[:10]:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                mismatches = r.get("lab_value_mismatches", 0)
-                mismatch_details = r.get("lab_value_mismatch_details", [])
-                add_line(f"    - {hadm_id} ({mismatches} mismatches):")
-                for detail in mismatch_details[:5]:  # Show first 5 mismatches
-                    add_line(
-                        f"      itemid {detail['itemid']}: CDMv1='{detail['cdm_value']}' vs New='{detail['new_value']}'"
-                    )
-                if len(mismatch_details) > 5:
-                    add_line(f"      ... and {len(mismatch_details) - 5} more")
-            if len(cases_with_value_mismatch) > 10:
-                add_line(f"    ... and {len(cases_with_value_mismatch) - 10} more")
+        add_line(f"  Total missing:             {totals['lab_missing']}")
+        add_line(f"  Total extra:               {totals['lab_extra']}")
+        add_line(f"  Labs with itemid:          {totals['new_labs_have_itemid']}")
+        add_line(f"  ItemID overlap:            {totals['itemid_overlap']}")
+        add_line(f"  Value matches:             {totals['lab_value_matches']}")
+        add_line(f"  Value mismatches:          {totals['lab_value_mismatches']}")
+
+        add_cases(
+            "missing_labs",
+            "Cases with missing lab tests",
+            lambda r: (
+                f"    - {r['hadm_id']} ({r.get('lab_missing', 0)} missing): "
+                f"itemids {r.get('lab_missing_itemids', [])}"
+            ),
+        )
+        add_cases(
+            "extra_labs",
+            "Cases with extra lab tests",
+            lambda r: (
+                f"    - {r['hadm_id']} ({r.get('lab_extra', 0)} extra): "
+                f"itemids {r.get('lab_extra_itemids', [])}"
+            ),
+        )
+        add_cases(
+            "lab_value_mismatch", "Cases with lab value mismatches", _format_lab_value_mismatches
+        )
 
         add_line("\nRadiology:")
-        rad_matches = sum(1 for r in found_cases if r.get("radiology_match", False))
-        total_rad_with_note_id = sum(r.get("new_radiology_have_note_id", 0) for r in found_cases)
-        total_exam_overlap = sum(r.get("radiology_exam_overlap", 0) for r in found_cases)
-        total_exam_missing = sum(r.get("radiology_exam_missing", 0) for r in found_cases)
-        total_exam_extra = sum(r.get("radiology_exam_extra", 0) for r in found_cases)
+        rad_matches = totals["radiology_match"]
 
         # Calculate average text similarity
-        cases_with_text = [r for r in found_cases if "radiology_text_similarity" in r]
-        if cases_with_text:
-            avg_text_sim = sum(r["radiology_text_similarity"] for r in cases_with_text) / len(
-                cases_with_text
-            )
-        else:
-            avg_text_sim = 0.0
+        avg_text_sim = text_sim_sum / text_sim_count if text_sim_count else 0.0
 
         add_line(
-            f"  Exact count match:         {rad_matches}/{len(found_cases)} ({rad_matches / len(found_cases):.1%})"
+            f"  Exact count match:         {rad_matches}/{num_found} ({rad_matches / num_found:.1%})"
         )
-        add_line(f"  Reports with note_id:      {total_rad_with_note_id}")
-        add_line(f"  Exam name overlap:         {total_exam_overlap}")
-        add_line(f"  Exam name missing:         {total_exam_missing}")
-        add_line(f"  Exam name extra:           {total_exam_extra}")
+        add_line(f"  Reports with note_id:      {totals['new_radiology_have_note_id']}")
+        add_line(f"  Exam name overlap:         {totals['radiology_exam_overlap']}")
+        add_line(f"  Exam name missing:         {totals['radiology_exam_missing']}")
+        add_line(f"  Exam name extra:           {totals['radiology_exam_extra']}")
         add_line(f"  Avg text similarity:   {avg_text_sim:.1%}")
 
-        # Cases with radiology count mismatch
-        rad_count_mismatch = [
-            r["hadm_id"] for r in found_cases if not r.get("radiology_match", False)
-        ]
-        if rad_count_mismatch:
-            add_line(f"\n  Cases with radiology count mismatch ({len(rad_count_mismatch)}):")
-            for hadm_id in rad_count_mismatch[:10]:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                cdm_count = r.get("cdm_radiology_count", 0)
-                new_count = r.get("new_radiology_count", 0)
-                add_line(f"    - {hadm_id} (CDMv1: {cdm_count}, New: {new_count})")
-            if len(rad_count_mismatch) > 10:
-                add_line(f"    ... and {len(rad_count_mismatch) - 10} more")
-
-        # Cases with missing radiology exams
-        rad_exam_missing = [
-            r["hadm_id"] for r in found_cases if r.get("radiology_exam_missing", 0) > 0
-        ]
-        if rad_exam_missing:
-            add_line(f"\n  Cases with missing radiology exam names ({len(rad_exam_missing)}):")
-            for hadm_id in rad_exam_missing[:10]:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                missing = r.get("radiology_exam_missing", 0)
-                missing_exams = r.get("radiology_missing_exams", [])
-                add_line(f"    - {hadm_id} ({missing} missing): {missing_exams}")
-            if len(rad_exam_missing) > 10:
-                add_line(f"    ... and {len(rad_exam_missing) - 10} more")
-
-        # Cases with extra radiology exams
-        rad_exam_extra = [r["hadm_id"] for r in found_cases if r.get("radiology_exam_extra", 0) > 0]
-        if rad_exam_extra:
-            add_line(f"\n  Cases with extra radiology exam names ({len(rad_exam_extra)}):")
-            for hadm_id in rad_exam_extra[:10]:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                extra = r.get("radiology_exam_extra", 0)
-                extra_exams = r.get("radiology_extra_exams", [])
-                add_line(f"    - {hadm_id} ({extra} extra): {extra_exams}")
-            if len(rad_exam_extra) > 10:
-                add_line(f"    ... and {len(rad_exam_extra) - 10} more")
-
-        # Cases with low text similarity
-        low_text_sim = [
-            r["hadm_id"] for r in found_cases if r.get("radiology_text_similarity", 1.0) < 0.8
-        ]
-        if low_text_sim:
-            add_line(f"\n  Cases with text similarity < 80% ({len(low_text_sim)}):")
-            for hadm_id in low_text_sim[:10]:
-                sim = next(
-                    r.get("radiology_text_similarity", 0)
-                    for r in found_cases
-                    if r["hadm_id"] == hadm_id
-                )
-                add_line(f"    - {hadm_id} ({sim:.1%})")
-            if len(low_text_sim) > 10:
-                add_line(f"    ... and {len(low_text_sim) - 10} more")
+        add_cases(
+            "radiology_count_mismatch",
+            "Cases with radiology count mismatch",
+            lambda r: (
+                f"    - {r['hadm_id']} (CDMv1: {r.get('cdm_radiology_count', 0)}, "
+                f"New: {r.get('new_radiology_count', 0)})"
+            ),
+        )
+        add_cases(
+            "radiology_exam_missing",
+            "Cases with missing radiology exam names",
+            lambda r: (
+                f"    - {r['hadm_id']} ({r.get('radiology_exam_missing', 0)} missing): "
+                f"{r.get('radiology_missing_exams', [])}"
+            ),
+        )
+        add_cases(
+            "radiology_exam_extra",
+            "Cases with extra radiology exam names",
+            lambda r: (
+                f"    - {r['hadm_id']} ({r.get('radiology_exam_extra', 0)} extra): "
+                f"{r.get('radiology_extra_exams', [])}"
+            ),
+        )
+        add_cases(
+            "low_radiology_text",
+            "Cases with text similarity < 80%",
+            lambda r: f"    - {r['hadm_id']} ({r.get('radiology_text_similarity', 0):.1%})",
+        )
 
         add_line("\nMicrobiology:")
-        micro_matches = sum(1 for r in found_cases if r.get("micro_match", False))
-        total_micro_with_itemid = sum(r.get("new_micro_have_itemid", 0) for r in found_cases)
-        total_organism_overlap = sum(r.get("micro_organism_overlap", 0) for r in found_cases)
-        total_organism_missing = sum(r.get("micro_organism_missing", 0) for r in found_cases)
-        total_organism_extra = sum(r.get("micro_organism_extra", 0) for r in found_cases)
+        micro_matches = totals["micro_match"]
 
         add_line(
-            f"  Exact count match:         {micro_matches}/{len(found_cases)} ({micro_matches / len(found_cases):.1%})"
+            f"  Exact count match:         {micro_matches}/{num_found} ({micro_matches / num_found:.1%})"
+        )
+        add_line(f"  Events with test_itemid:   {totals['new_micro_have_itemid']}")
+        add_line(f"  Organism overlap:          {totals['micro_organism_overlap']}")
+        add_line(f"  Organism missing:          {totals['micro_organism_missing']}")
+        add_line(f"  Organism extra:            {totals['micro_organism_extra']}")
+
+        add_cases(
+            "micro_count_mismatch",
+            "Cases with microbiology count mismatch",
+            lambda r: (
+                f"    - {r['hadm_id']} "
+                f"(CDMv1: {r.get('cdm_micro_count', 0)}, New: {r.get('new_micro_count', 0)})"
+            ),
+        )
+        add_cases(
+            "micro_organism_missing",
+            "Cases with missing organisms",
+            lambda r: (
+                f"    - {r['hadm_id']} ({r.get('micro_organism_missing', 0)} missing): "
+                f"{r.get('micro_missing_values', [])}"
+            ),
+        )
+        add_cases(
+            "micro_organism_extra",
+            "Cases with extra organisms",
+            lambda r: (
+                f"    - {r['hadm_id']} ({r.get('micro_organism_extra', 0)} extra): "
+                f"{r.get('micro_extra_values', [])}"
+            ),
         )
-        add_line(f"  Events with test_itemid:   {total_micro_with_itemid}")
-        add_line(f"  Organism overlap:          {total_organism_overlap}")
-        add_line(f"  Organism missing:          {total_organism_missing}")
-        add_line(f"  Organism extra:            {total_organism_extra}")
-
-        # Cases with micro count mismatch
-        micro_count_mismatch = [
-            r["hadm_id"] for r in found_cases if not r.get("micro_match", False)
-        ]
-        if micro_count_mismatch:
-            add_line(f"\n  Cases with microbiology count mismatch ({len(micro_count_mismatch)}):")
-            for hadm_id in micro_count_mismatch[:10]:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                cdm_count = r.get("cdm_micro_count", 0)
-                new_count = r.get("new_micro_count", 0)
-                add_line(f"    - {hadm_id} (CDMv1: {cdm_count}, New: {new_count})")
-            if len(micro_count_mismatch) > 10:
-                add_line(f"    ... and {len(micro_count_mismatch) - 10} more")
-
-        # Cases with missing organisms
-        micro_organism_missing = [
-            r["hadm_id"] for r in found_cases if r.get("micro_organism_missing", 0) > 0
-        ]
-        if micro_organism_missing:
-            add_line(f"\n  Cases with missing organisms ({len(micro_organism_missing)}):")
-            for hadm_id in micro_organism_missing[:10]:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                missing = r.get("micro_organism_missing", 0)
-                missing_values = r.get("micro_missing_values", [])
-                add_line(f"    - {hadm_id} ({missing} missing): {missing_values}")
-            if len(micro_organism_missing) > 10:
-                add_line(f"    ... and {len(micro_organism_missing) - 10} more")
-
-        # Cases with extra organisms
-        micro_organism_extra = [
-            r["hadm_id"] for r in found_cases if r.get("micro_organism_extra", 0) > 0
-        ]
-        if micro_organism_extra:
-            add_line(f"\n  Cases with extra organisms ({len(micro_organism_extra)}):")
-            for hadm_id in micro_organism_extra[:10]:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                extra = r.get("micro_organism_extra", 0)
-                extra_values = r.get("micro_extra_values", [])
-                add_line(f"    - {hadm_id} ({extra} extra): {extra_values}")
-            if len(micro_organism_extra) > 10:
-                add_line(f"    ... and {len(micro_organism_extra) - 10} more")
 
         add_line("\nDiagnosis:")
-        diag_matches = sum(1 for r in found_cases if r.get("diagnosis_in_discharge", False))
-        avg_num_diagnoses = sum(r.get("num_diagnoses", 1) for r in found_cases) / len(found_cases)
+        diag_matches = totals["diagnosis_in_discharge"]
+        avg_num_diagnoses = totals["num_diagnoses"] / num_found
         add_line(
-            f"  Diagnosis match:           {diag_matches}/{len(found_cases)} ({diag_matches / len(found_cases):.1%})"
+            f"  Diagnosis match:           {diag_matches}/{num_found} ({diag_matches / num_found:.1%})"
         )
         add_line(f"  Avg diagnoses per case:    {avg_num_diagnoses:.1f}")
 
-        # Cases with diagnosis not found
-        diag_not_found = [
-            r["hadm_id"] for r in found_cases if not r.get("diagnosis_in_discharge", False)
-        ]
-        if diag_not_found:
-            add_line(f"\n  Cases with diagnosis not found ({len(diag_not_found)}):")
-            for hadm_id in diag_not_found[:10]:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                diag = r.get("diagnosis")
-                add_line(f"    - {hadm_id} ({diag})")
-            if len(diag_not_found) > 10:
-                add_line(f"    ... and {len(diag_not_found) - 10} more")
+        add_cases(
+            "diagnosis_not_found",
+            "Cases with diagnosis not found",
+            lambda r: f"    - {r['hadm_id']} ({r.get('diagnosis')})",
+        )
 
         add_line("\nDemographics:")
-        has_demo = sum(1 for r in found_cases if r.get("has_demographics", False))
-        has_age = sum(1 for r in found_cases if r.get("has_age", False))
-        has_gender = sum(1 for r in found_cases if r.get("has_gender", False))
-        add_line(
-            f"  Cases with demographics:   {has_demo}/{len(found_cases)} ({has_demo / len(found_cases):.1%})"
+        for label, key in (
+            ("demographics", "has_demographics"),
+            ("age", "has_age"),
+            ("gender", "has_gender"),
+        ):
+            count = totals[key]
+            add_line(f"  Cases with {label + ':':<16}{count}/{num_found} ({count / num_found:.1%})")
+
+        add_cases(
+            "missing_demographics", "Cases missing demographics", lambda r: f"    - {r['hadm_id']}"
         )
-        add_line(
-            f"  Cases with age:            {has_age}/{len(found_cases)} ({has_age / len(found_cases):.1%})"
-        )
-        add_line(
-            f"  Cases with gender:         {has_gender}/{len(found_cases)} ({has_gender / len(found_cases):.1%})"
-        )
-
-        # Cases missing demographics
-        missing_demo = [r["hadm_id"] for r in found_cases if not r.get("has_demographics", False)]
-        if missing_demo:
-            add_line(f"\n  Cases missing demographics ({len(missing_demo)}):")
-            for hadm_id in missing_demo[:10]:
-                add_line(f"    - {hadm_id}")
-            if len(missing_demo) > 10:
-                add_line(f"    ... and {len(missing_demo) - 10} more")
 
         add_line("\nProcedures/Treatments:")
-        avg_cdm_proc = sum(r.get("cdm_procedures_count", 0) for r in found_cases) / len(found_cases)
-        avg_new_treat = sum(r.get("new_treatments_count", 0) for r in found_cases) / len(
-            found_cases
-        )
-        total_exact = sum(r.get("procedures_exact_matches", 0) for r in found_cases)
-        total_partial = sum(r.get("procedures_partial_matches", 0) for r in found_cases)
+        avg_cdm_proc = totals["cdm_procedures_count"] / num_found
+        avg_new_treat = totals["new_treatments_count"] / num_found
         add_line(f"  Avg CDMv1 procedures:      {avg_cdm_proc:.1f}")
         add_line(f"  Avg new treatments:        {avg_new_treat:.1f}")
-        add_line(f"  Total exact matches:       {total_exact}")
-        add_line(f"  Total partial matches:     {total_partial}")
-
-        # Cases with no procedure matches
-        no_proc_match = [
-            r["hadm_id"]
-            for r in found_cases
-            if r.get("procedures_partial_matches", 0) == 0 and r.get("cdm_procedures_count", 0) > 0
-        ]
-        if no_proc_match:
-            add_line(f"\n  Cases with no procedure matches ({len(no_proc_match)}):")
-            for hadm_id in no_proc_match:
-                r = next(x for x in found_cases if x["hadm_id"] == hadm_id)
-                cdm_count = r.get("cdm_procedures_count", 0)
-                new_count = r.get("new_treatments_count", 0)
-                add_line(f"    - {hadm_id} (CDMv1: {cdm_count}, New: {new_count})")
-
-    add_line(f"\n{'=' * 80}\n")
-
-    # Save summary to file
+        add_line(f"  Total exact matches:       {totals['procedures_exact_matches']}")
+        add_line(f"  Total partial matches:     {totals['procedures_partial_matches']}")
+
+        add_cases(
+            "no_procedure_match",
+            "Cases with no procedure matches",
+            lambda r: (
+                f"    - {r['hadm_id']} "
+                f"(CDMv1: {r['cdm_procedures_count']}, New: {r['new_treatments_count']})"
+            ),
+        )
+
+    add_line(f"\n{'=' * 80}")
+
+    # Save summary to file, writing the lines directly instead of joining them first
     with open(output_file, "w") as f:
-        f.write("\n".join(summary_lines))
+        f.writelines(f"{line}\n" for line in summary_lines)
 
-    add_line(f"Summary report saved to: {output_file}")
+    # Print the collected summary in one call instead of one print per line
+    sys.stdout.writelines(f"{line}\n" for line in summary_lines)
+    sys.stdout.write(f"\nSummary report saved to: {output_file}\n")
 
     return results
 
@@ -812,22 +1063,39 @@ Examples:
         default=None,
         help="Path to save comparison report (default: auto-generated next to dataset)",
     )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for the per-case comparison (default: 1, which "
+        "compares in the main process)",
+    )
 
     args = parser.parse_args()
 
     # Check if dataset file exists
-    if not Path(args.dataset).exists():
+    try:
+        os.stat(args.dataset)
+    except PermissionError as e:
+        print(f"Error: Cannot access dataset file: {e}")
+        return 1
+    except OSError:
         print(f"Error: Dataset file not found: {args.dataset}")
         return 1
 
     # Check if CDMv1 directory exists
-    if not Path(args.cdm_v1_dir).exists():
+    try:
+        os.stat(args.cdm_v1_dir)
+    except PermissionError as e:
+        print(f"Error: Cannot access CDMv1 directory: {e}")
+        return 1
+    except OSError:
         print(f"Error: CDMv1 directory not found: {args.cdm_v1_dir}")
         return 1
 
     # Run comparison
     try:
-        compare_datasets(args.dataset, args.cdm_v1_dir, args.output)
+        compare_datasets(args.dataset, args.cdm_v1_dir, args.output, args.num_workers)
         return 0
     except Exception as e:
         print(f"Error during comparison: {e}")
@@ -59,3 +59,35 @@ def db_cursor():
     finally:
         conn.close()
         logger.debug("Database connection closed")
+
+
+@contextmanager
+def db_session(prepare_threshold: int | None = 1):
+    """
+    Context manager for one long-lived connection shared by many queries.
+
+    Use this instead of db_cursor() for loops that run the same queries for many
+    admissions: the connection is set up once, and psycopg prepares each statement
+    server-side once it has been executed prepare_threshold times, so repeated
+    queries skip parsing and planning.
+
+    Args:
+        prepare_threshold: Executions before a statement is prepared (0 prepares on
+            first use, None disables preparing)
+
+    Yields:
+        tuple[psycopg.Connection, psycopg.Cursor]: Connection and cursor for executing queries
+    """
+    conn = get_db_connection()
+    conn.prepare_threshold = prepare_threshold
+    try:
+        with conn.cursor() as cur:
+            yield conn, cur
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Database operation failed: {e}")
+        raise
+    finally:
+        conn.close()
+        logger.debug("Database connection closed")
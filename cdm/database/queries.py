@@ -33,6 +33,33 @@ def get_demographics(cursor: psycopg.Cursor, hadm_id: int) -> dict | None:
     return None
 
 
+def get_demographics_bulk(cursor: psycopg.Cursor, hadm_ids: list[int]) -> dict[int, dict]:
+    """
+    Get patient demographics for many admissions with a single query.
+
+    Args:
+        cursor: Database cursor
+        hadm_ids: Hospital admission IDs
+
+    Returns:
+        dict mapping hadm_id to a dict with 'age' and 'gender'; admissions without
+        demographics are missing
+    """
+    query = """
+        SELECT a.hadm_id, p.anchor_age, p.gender
+        FROM cdm_hosp.admissions a
+        JOIN cdm_hosp.patients p ON a.subject_id = p.subject_id
+        WHERE a.hadm_id = ANY(%s)
+    """
+    cursor.execute(query, (hadm_ids,))
+    demographics = {row[0]: {"age": row[1], "gender": row[2]} for row in cursor.fetchall()}
+
+    for hadm_id in hadm_ids:
+        if hadm_id not in demographics:
+            logger.warning(f"No demographics found for hadm_id={hadm_id}")
+    return demographics
+
+
 def get_presenting_chief_complaints(cursor: psycopg.Cursor, hadm_id: int) -> list[str]:
     """
     Get all chief complaints with category='chief_complaint' for a given admission.
@@ -272,16 +272,16 @@ def extract_findings_from_report(raw_report_text: str) -> str:
 
     sections = parse_report(raw_report_text)
 
-    text_clean = ""
+    kept_sections = []
 
     for field, content in sections.items():
         # Check if field starts with any bad field string
         is_bad = any(field.startswith(bad) for bad in BAD_RAD_FIELDS)
 
         if not is_bad and content.strip():
-            text_clean += f"{field}:\n{content}\n\n"
+            kept_sections.append(f"{field}:\n{content}\n\n")
 
-    return text_clean.strip()
+    return "".join(kept_sections).strip()
 
 
 def derive_modality(exam_name: str, text: str) -> str:
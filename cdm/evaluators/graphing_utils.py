@@ -69,7 +69,7 @@ def read_jsonl(path: str) -> Iterable[dict]:
     :return: iterable dict object
     :rtype: Iterable[dict]
     """
-    with open(path) as f:
+    with open(path, encoding="utf-8") as f:
         for line in f:
             if line.strip():
                 yield json.loads(line)
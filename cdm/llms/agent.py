@@ -1,8 +1,12 @@
+import json
 import logging
 
 from langchain.agents import create_agent
+from langchain.agents.structured_output import ProviderStrategy
+from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
 from loguru import logger
+from pydantic import ValidationError
 
 from cdm.benchmark.data_models import AgentRunResult, BenchmarkOutputCDM, BenchmarkOutputFullInfo
 from cdm.prompts.gen_prompt_cdm import create_system_prompt, create_user_prompt
@@ -10,6 +14,8 @@ from cdm.tools import AVAILABLE_TOOLS
 
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
+JSON_DECODER = json.JSONDecoder()
+
 
 def build_llm(base_url: str, temperature: float) -> ChatOpenAI:
     """Build plain ChatOpenAI client.
@@ -26,21 +32,34 @@ def build_llm(base_url: str, temperature: float) -> ChatOpenAI:
     )
 
 
+def build_structured_llm(llm: ChatOpenAI) -> Runnable:
+    """Bind the BenchmarkOutputFullInfo schema to the LLM for structured output.
+
+    Build this once per run and share it across cases instead of re-deriving the
+    schema binding for every request.
+
+    Args:
+        llm: ChatOpenAI client
+
+    Returns:
+        Runnable returning parsed BenchmarkOutputFullInfo objects
+    """
+    return llm.with_structured_output(BenchmarkOutputFullInfo)
+
+
 async def run_llm_async(
-    llm: ChatOpenAI, system_prompt: str, user_prompt: str
+    llm: Runnable, system_prompt: str, user_prompt: str
 ) -> BenchmarkOutputFullInfo:
     """Run the LLM with given system and user prompts.
 
     Args:
-        llm: ChatOpenAI client
+        llm: Structured output LLM from build_structured_llm
         system_prompt: System prompt string
         user_prompt: User prompt string
 
     Returns:
         Parsed benchmark output
     """
-    llm = llm.with_structured_output(BenchmarkOutputFullInfo)
-
     try:
         response = await llm.ainvoke(
             [
@@ -55,12 +74,14 @@ async def run_llm_async(
     return response
 
 
-def build_agent(llm: ChatOpenAI, enabled_tools: list[str]):
+def build_agent(llm: ChatOpenAI, enabled_tools: list[str], structured_output: bool = False):
     """Build a LangChain agent with tool calling capabilities.
 
     Args:
         llm: ChatOpenAI client
         enabled_tools: List of tool names to enable (e.g., ["physical_exam", "lab"])
+        structured_output: Constrain the final answer to the BenchmarkOutputCDM JSON schema
+            via server-side guided decoding instead of parsing free-form text
 
     Raises:
         ValueError: If any tool name in enabled_tools is not in AVAILABLE_TOOLS
@@ -75,15 +96,16 @@ def build_agent(llm: ChatOpenAI, enabled_tools: list[str]):
     # Get the enabled tools
     tools = [AVAILABLE_TOOLS[tool_name] for tool_name in enabled_tools]
 
-    # Generate system prompt with Pydantic schema
-    system_prompt = create_system_prompt()
+    # Generate system prompt; the schema description is redundant when decoding is constrained
+    system_prompt = create_system_prompt(include_schema=not structured_output)
 
     agent = create_agent(
         model=llm,
         tools=tools,
         system_prompt=system_prompt,
+        response_format=ProviderStrategy(BenchmarkOutputCDM) if structured_output else None,
     )
-    logger.info(f"Built agent with tools: {enabled_tools}")
+    logger.info(f"Built agent with tools: {enabled_tools} (structured output: {structured_output})")
     return agent
 
 
@@ -99,6 +121,40 @@ def strip_markdown_json(content: str) -> str:
     return content.strip()
 
 
+def parse_agent_output(content: str) -> BenchmarkOutputCDM:
+    """Parse the agent's final message into BenchmarkOutputCDM.
+
+    Validates the raw content in a single pass with pydantic-core's JSON parser. Only if
+    that fails are markdown fences stripped and the first complete JSON object decoded,
+    so prose before or after it (even containing braces) is ignored.
+
+    Args:
+        content: Content of the agent's last message
+
+    Returns:
+        Parsed benchmark output
+
+    Raises:
+        ValidationError: If no valid BenchmarkOutputCDM can be extracted
+    """
+    try:
+        return BenchmarkOutputCDM.model_validate_json(content)
+    except ValidationError:
+        pass
+
+    cleaned_content = strip_markdown_json(content)
+    start = cleaned_content.find("{")
+    if start != -1:
+        try:
+            # Decode only the first complete JSON object, ignoring any text appended after it
+            data, _ = JSON_DECODER.raw_decode(cleaned_content, start)
+        except json.JSONDecodeError:
+            pass
+        else:
+            return BenchmarkOutputCDM.model_validate(data)
+    return BenchmarkOutputCDM.model_validate_json(cleaned_content)
+
+
 async def run_agent_async(agent, patient_info: str) -> AgentRunResult | None:
     """Invoke agent with patient information and return parsed diagnosis output and full conversation history.
 
@@ -126,11 +182,14 @@ async def run_agent_async(agent, patient_info: str) -> AgentRunResult | None:
         return None
 
     last_message_content = response["messages"][-1].content
-    cleaned_content = strip_markdown_json(last_message_content)
     try:
-        parsed_output = BenchmarkOutputCDM.model_validate_json(cleaned_content)
+        parsed_output = response.get("structured_response") or parse_agent_output(
+            last_message_content
+        )
     except Exception as e:
-        logger.error(f"Failed to validate agent output: {e}\nUnparsed output: {cleaned_content!r}")
+        logger.error(
+            f"Failed to validate agent output: {e}\nUnparsed output: {last_message_content!r}"
+        )
         return None
 
     messages_as_dicts = [msg.dict() for msg in response["messages"]]
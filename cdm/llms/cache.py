@@ -0,0 +1,77 @@
+"""Exact-match on-disk cache for LLM responses."""
+
+import hashlib
+import sqlite3
+from pathlib import Path
+
+from loguru import logger
+
+
+class ResponseCache:
+    """SQLite-backed cache mapping a hash of the request to the validated JSON response."""
+
+    def __init__(self, path: Path):
+        """Open (or create) the cache database.
+
+        Args:
+            path: Path to the SQLite cache file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self.conn.commit()
+        logger.info(f"Using LLM response cache: {path}")
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Build a SHA-256 cache key from the parts that determine the LLM response.
+
+        Args:
+            *parts: Values identifying the request (model, temperature, prompts, ...)
+
+        Returns:
+            Hex digest of the request
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode())
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_prompt_key(skeleton: str, slots: dict, *parts) -> str:
+        """Build a cache key from a static prompt skeleton and its per-case slot values.
+
+        The skeleton (system prompt and user template) is hashed separately from the slots.
+        Slot values are hashed exactly as given, since any difference reaches the model.
+
+        Args:
+            skeleton: Static part of the prompt shared by all cases, including the source of
+                the template the slots are rendered into
+            slots: Per-case values filled into the prompt template
+            *parts: Further values identifying the request (model, temperature, ...)
+
+        Returns:
+            Hex digest of the request
+        """
+        skeleton_hash = hashlib.sha256(skeleton.encode()).hexdigest()
+        return ResponseCache.make_key(skeleton_hash, sorted(slots.items()), *parts)
+
+    def get(self, key: str) -> str | None:
+        """Return the cached JSON response for key, or None on a cache miss."""
+        row = self.conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        """Store the JSON response for key."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value) VALUES (?, ?)", (key, value)
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self.conn.close()
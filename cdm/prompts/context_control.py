@@ -10,6 +10,7 @@ This module implements a cascading context control strategy:
 Note: Only imaging is affected. Labs, history, physical exam, microbiology are never touched.
 """
 
+from functools import cache
 from pathlib import Path
 
 from jinja2 import Environment, FileSystemLoader
@@ -20,14 +21,17 @@ from cdm.benchmark.data_models import HadmCase
 from cdm.prompts.gen_prompt_full_info import create_user_prompt
 from cdm.prompts.text_utils import VLLMTokenizer, calculate_num_tokens, truncate_text
 
-# Load Jinja2 environment for templates
+# Load Jinja2 environment for templates (compiled once, no per-render mtime check)
 TEMPLATE_DIR = Path(__file__).parent
-jinja_env = Environment(loader=FileSystemLoader(searchpath=TEMPLATE_DIR))
+jinja_env = Environment(loader=FileSystemLoader(searchpath=TEMPLATE_DIR), auto_reload=False)
 
 
+@cache
 def create_summarization_prompt() -> str:
     """Load summarization system prompt from Jinja2 template.
 
+    The prompt is static, so it is rendered once and reused for every case.
+
     Returns:
         System prompt string for summarization (exact MIMIC-CDM prompt).
     """
@@ -44,14 +48,14 @@ def format_abdomen_only_imaging(case: HadmCase) -> str:
     Returns:
         Formatted string with abdomen-only imaging reports
     """
-    imaging_results = ""
+    imaging_lines = []
     for imaging in case.radiology_reports:
         if imaging.region == "Abdomen":
             modality = imaging.modality or ""
             reports = imaging.text or ""
-            imaging_results += f"{modality} {imaging.region}\n"
-            imaging_results += f"{reports}\n\n"
-    return imaging_results.strip()
+            imaging_lines.append(f"{modality} {imaging.region}\n")
+            imaging_lines.append(f"{reports}\n\n")
+    return "".join(imaging_lines).strip()
 
 
 async def summarize_single_report(
@@ -1,3 +1,4 @@
+from functools import cache
 from pathlib import Path
 
 from jinja2 import Environment, FileSystemLoader
@@ -6,23 +7,41 @@ from cdm.benchmark.data_models import BenchmarkOutputCDM
 from cdm.prompts.utils import pydantic_to_prompt
 
 TEMPLATE_DIR = Path(__file__).parent
-jinja_env = Environment(loader=FileSystemLoader(searchpath=TEMPLATE_DIR))
+# Templates are compiled once and never change at runtime, so skip the per-render mtime check
+jinja_env = Environment(loader=FileSystemLoader(searchpath=TEMPLATE_DIR), auto_reload=False)
 
 
-def create_system_prompt(template_name: str = "cdm/system.j2") -> str:
+@cache
+def create_system_prompt(template_name: str = "cdm/system.j2", include_schema: bool = True) -> str:
     """Create CDM system prompt with Pydantic schema.
 
     Args:
         template_name: Path to Jinja2 template file (default: "cdm/system.j2")
+        include_schema: Describe the output schema in the prompt. Disable when the schema is
+            already enforced by structured output, to avoid sending it twice per request.
 
     Returns:
         System prompt string with JSON schema for BenchmarkOutputCDM
     """
     template = jinja_env.get_template(template_name)
-    pydantic_schema = pydantic_to_prompt(BenchmarkOutputCDM)
+    pydantic_schema = pydantic_to_prompt(BenchmarkOutputCDM) if include_schema else None
     return template.render(pydantic_schema=pydantic_schema)
 
 
+@cache
+def get_template_source(template_name: str = "cdm/user.j2") -> str:
+    """Return the source of a prompt template, e.g. to key cached responses on it.
+
+    Args:
+        template_name: Path to Jinja2 template file (default: "cdm/user.j2")
+
+    Returns:
+        Template source string
+    """
+    source, _, _ = jinja_env.loader.get_source(jinja_env, template_name)
+    return source
+
+
 def create_user_prompt(patient_info: str, template_name: str = "cdm/user.j2") -> str:
     """Create CDM user prompt with patient information.
 
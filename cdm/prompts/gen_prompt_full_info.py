@@ -1,3 +1,4 @@
+from functools import cache
 from pathlib import Path
 
 from jinja2 import Environment, FileSystemLoader
@@ -6,9 +7,11 @@ from cdm.benchmark.data_models import BenchmarkOutputFullInfo
 from cdm.prompts.utils import pydantic_to_prompt
 
 TEMPLATE_DIR = Path(__file__).parent
-jinja_env = Environment(loader=FileSystemLoader(searchpath=TEMPLATE_DIR))
+# Templates are compiled once and never change at runtime, so skip the per-render mtime check
+jinja_env = Environment(loader=FileSystemLoader(searchpath=TEMPLATE_DIR), auto_reload=False)
 
 
+@cache
 def create_system_prompt(template_name: str = "full_info/system.j2") -> str:
     """Create full info system prompt with Pydantic schema.
 
@@ -23,6 +26,20 @@ def create_system_prompt(template_name: str = "full_info/system.j2") -> str:
     return template.render(pydantic_schema=pydantic_schema)
 
 
+@cache
+def get_template_source(template_name: str = "full_info/user.j2") -> str:
+    """Return the source of a prompt template, e.g. to key cached responses on it.
+
+    Args:
+        template_name: Path to Jinja2 template file (default: "full_info/user.j2")
+
+    Returns:
+        Template source string
+    """
+    source, _, _ = jinja_env.loader.get_source(jinja_env, template_name)
+    return source
+
+
 def create_user_prompt(case: dict, template_name: str = "full_info/user.j2") -> str:
     """Create full info user prompt with case data.
 
@@ -4,6 +4,9 @@ from cdm.tools.labs import request_lab_test
 from cdm.tools.physical_exam import physical_examination
 from cdm.tools.radiology import request_imaging
 
+# Bump when the observations returned by a tool change, so cached agent runs are not reused
+TOOLS_VERSION = 1
+
 AVAILABLE_TOOLS = {
     "physical_exam": physical_examination,
     "lab": request_lab_test,
@@ -19,4 +22,5 @@ __all__ = [
     "request_imaging",
     "retrieve_diagnosis_criteria",
     "AVAILABLE_TOOLS",
+    "TOOLS_VERSION",
 ]
@@ -1,9 +1,9 @@
 """Lab test parsing utilities."""
 
-import json
 import re
 from pathlib import Path
 
+import orjson
 from loguru import logger
 from thefuzz import fuzz, process
 
@@ -23,10 +23,7 @@ def load_lab_test_mapping() -> list[dict]:
         logger.warning(f"Lab test mapping not found at {LAB_TEST_MAPPING_PATH}")
         return []
 
-    with open(LAB_TEST_MAPPING_PATH) as f:
-        data = json.load(f)
-
-    return data
+    return orjson.loads(LAB_TEST_MAPPING_PATH.read_bytes())
 
 
 def extract_short_and_long_name(test_name: str) -> tuple[str, str]:
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from langchain.tools import tool
 
 from cdm.benchmark.data_models import DetailedLabResult, HadmCase, MicrobiologyEvent
@@ -42,6 +44,14 @@ def request_lab_test(test_name: str) -> str:
     # Convert to itemids using fuzzy matching and panel expansion
     itemids = convert_labs_to_itemid(test_names, LAB_TEST_MAPPING_DF)
 
+    # Index results by itemid once instead of rescanning all results per requested item
+    labs_by_itemid = defaultdict(list)
+    for lab in lab_results:
+        labs_by_itemid[lab.itemid].append(lab)
+    microbio_by_itemid = defaultdict(list)
+    for micro in microbiology_events:
+        microbio_by_itemid[micro.test_itemid].append(micro)
+
     # Collect matching results
     results = []
     not_found = []
@@ -49,16 +59,14 @@ def request_lab_test(test_name: str) -> str:
     for item in itemids:
         if isinstance(item, int):
             # First check lab results
-            matching_labs = [lab for lab in lab_results if lab.itemid == item]
+            matching_labs = labs_by_itemid.get(item)
 
             if matching_labs:
                 for lab in matching_labs:
                     results.append(format_lab_result(lab))
             else:
                 # Fallback: check microbiology (Hager's logic)
-                matching_microbio = [
-                    micro for micro in microbiology_events if micro.test_itemid == item
-                ]
+                matching_microbio = microbio_by_itemid.get(item)
 
                 if matching_microbio:
                     for micro in matching_microbio:
@@ -68,17 +76,18 @@ def request_lab_test(test_name: str) -> str:
         else:
             # String search fallback (couldn't map to itemid)
             found = False
+            item_lower = str(item).lower()
 
             # Try lab results first
             for lab in lab_results:
-                if str(item).lower() in lab.test_name.lower():
+                if item_lower in lab.test_name.lower():
                     results.append(format_lab_result(lab))
                     found = True
 
             # If not found in labs, try microbiology
             if not found:
                 for micro in microbiology_events:
-                    if micro.test_name and str(item).lower() in micro.test_name.lower():
+                    if micro.test_name and item_lower in micro.test_name.lower():
                         results.append(format_microbiology_result(micro))
                         found = True
 
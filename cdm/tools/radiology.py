@@ -21,12 +21,15 @@ def request_imaging(region: str, modality: str) -> str:
     if not imaging_results:
         return "No imaging results available for this patient."
 
+    region_lower = region.lower()
+    modality_lower = modality.lower()
+
     # Search for matching imaging by region and modality
     for imaging in imaging_results:
         img_region = (imaging.region or "").lower()
         img_modality = (imaging.modality or "").lower()
 
-        if region.lower() in img_region and modality.lower() in img_modality:
+        if region_lower in img_region and modality_lower in img_modality:
             result = (
                 f"- Exam Name: {imaging.exam_name or 'N/A'}\n"
                 f"- Region: {imaging.region or 'N/A'}\n"
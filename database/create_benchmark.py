@@ -29,9 +29,9 @@ from cdm.benchmark.data_models import (
     RadiologyReport,
     Treatment,
 )
-from cdm.database.connection import get_db_connection
+from cdm.database.connection import db_session
 from cdm.database.queries import (
-    get_demographics,
+    get_demographics_bulk,
     get_ground_truth_diagnosis,
     get_ground_truth_treatments_coded,
     get_ground_truth_treatments_freetext,
@@ -53,17 +53,20 @@ def load_hadm_ids(filepath: Path) -> list[int]:
     return hadm_ids
 
 
-def create_hadm_case(cursor, hadm_id: int, extended: bool = False) -> HadmCase:
+def create_hadm_case(
+    cursor, hadm_id: int, demographics_data: dict | None, extended: bool = False
+) -> HadmCase:
     """Create a HadmCase by querying all relevant data for a given admission.
 
     Args:
         cursor: Database cursor
         hadm_id: Hospital admission ID
+        demographics_data: Demographics of the admission as returned by get_demographics_bulk,
+                 or None if not found
         extended: If True, get up to 3 results per test type with procedure filtering;
                  if False, use original CDMv1 logic (1 test, no filtering)
     """
 
-    demographics_data = get_demographics(cursor, hadm_id)
     demographics = Demographics(**demographics_data) if demographics_data else None
 
     history_of_present_illness = get_history_of_present_illness(cursor, hadm_id)
@@ -145,20 +148,22 @@ def main(cfg: DictConfig):
         )
         num_cases = len(hadm_ids)
 
-    # Connect to database
-    conn = get_db_connection()
-
-    try:
-        cursor = conn.cursor()
+    # Connect to database once; repeated per-admission queries are prepared server-side
+    with db_session() as (conn, cursor):
         cases = []
 
         logger.info(f"Processing {num_cases} admissions...")
 
+        # Fetch demographics for all admissions in one query instead of one per case
+        demographics_by_hadm = get_demographics_bulk(cursor, hadm_ids[:num_cases])
+
         # Process admissions
         extended = cfg.get("extended", False)
         for hadm_id in tqdm(hadm_ids[:num_cases], desc="Processing admissions"):
             try:
-                case = create_hadm_case(cursor, hadm_id, extended=extended)
+                case = create_hadm_case(
+                    cursor, hadm_id, demographics_by_hadm.get(hadm_id), extended=extended
+                )
 
                 # Add case
                 cases.append(case)
@@ -169,30 +174,25 @@ def main(cfg: DictConfig):
                 conn.rollback()
                 continue
 
-        # Check if we found any cases
-        if not cases:
-            raise RuntimeError("No admissions were successfully processed")
-
-        logger.success(f"Processed {len(cases)} cases out of {len(hadm_ids)} admissions")
+    # Check if we found any cases
+    if not cases:
+        raise RuntimeError("No admissions were successfully processed")
 
-        # Create benchmark dataset
-        benchmark = BenchmarkDataset(cases=cases)
-        logger.success(f"Created benchmark with {len(cases)} case(s)")
+    logger.success(f"Processed {len(cases)} cases out of {len(hadm_ids)} admissions")
 
-        # Export to JSON
-        logger.info(f"Writing benchmark to {output_file}")
-        json_output = benchmark.model_dump_json(indent=2)
+    # Create benchmark dataset
+    benchmark = BenchmarkDataset(cases=cases)
+    logger.success(f"Created benchmark with {len(cases)} case(s)")
 
-        with open(output_file, "w") as f:
-            f.write(json_output)
+    # Export to JSON
+    logger.info(f"Writing benchmark to {output_file}")
+    json_output = benchmark.model_dump_json(indent=2)
 
-        logger.success(f"Benchmark dataset saved to {output_file}")
-        logger.info(f"Processed {len(cases)} cases. See {output_file} for details.")
+    with open(output_file, "w") as f:
+        f.write(json_output)
 
-    finally:
-        cursor.close()
-        conn.close()
-        logger.info("Database connection closed")
+    logger.success(f"Benchmark dataset saved to {output_file}")
+    logger.info(f"Processed {len(cases)} cases. See {output_file} for details.")
 
 
 if __name__ == "__main__":
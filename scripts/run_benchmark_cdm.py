@@ -16,16 +16,20 @@ from openai import BadRequestError, LengthFinishReasonError
 from tqdm.asyncio import tqdm
 
 from cdm.benchmark.data_models import AgentRunResult, EvalOutput, HadmCase
-from cdm.benchmark.utils import load_cases, write_result_to_jsonl
+from cdm.benchmark.utils import JsonlWriter, load_cases
 from cdm.evaluators import get_evaluator
 from cdm.llms.agent import build_agent, build_llm, run_agent_async
-from cdm.tools import set_current_case
+from cdm.llms.cache import ResponseCache
+from cdm.prompts.gen_prompt_cdm import create_system_prompt, get_template_source
+from cdm.tools import AVAILABLE_TOOLS, TOOLS_VERSION, set_current_case
 
 
 async def process_case(
     agent: Runnable,
     case: HadmCase,
     semaphore: asyncio.Semaphore,
+    cache: ResponseCache | None = None,
+    run_fingerprint: str = "",
 ) -> tuple[HadmCase, AgentRunResult]:
     """Process a single case with semaphore-based rate limiting."""
     async with semaphore:
@@ -35,6 +39,15 @@ async def process_case(
         if not case.pathology:
             logger.warning(f"No pathology for case: {case.hadm_id}")
             return None
+
+        # Tools can read any part of the case, so the cache is keyed on the whole case
+        cache_key = None
+        if cache is not None:
+            cache_key = ResponseCache.make_key(run_fingerprint, case.model_dump_json())
+            cached_response = cache.get(cache_key)
+            if cached_response is not None:
+                return case, AgentRunResult.model_validate_json(cached_response)
+
         try:
             output = await run_agent_async(agent, patient_info)
             if output is None:
@@ -49,6 +62,8 @@ async def process_case(
             logger.error(f"Skipping case {case.hadm_id} due to model output token overflow")
             return None
 
+        if cache is not None:
+            cache.set(cache_key, output.model_dump_json())
         return case, output
 
 
@@ -56,7 +71,27 @@ async def run_benchmark(cfg: DictConfig):
     """Run CDM benchmark with concurrent async processing."""
     dataset = load_cases(cfg.benchmark_data_path, cfg.num_cases)
     llm = build_llm(cfg.base_url, cfg.temperature)
-    agent = build_agent(llm, cfg.enabled_tools)
+    agent = build_agent(llm, cfg.enabled_tools, cfg.structured_output)
+
+    # Optional response cache so repeated runs skip cases already answered by the same setup
+    cache = None
+    run_fingerprint = ""
+    if cfg.response_cache_path:
+        cache = ResponseCache(cfg.response_cache_path)
+        run_fingerprint = ResponseCache.make_key(
+            cfg.model_name,
+            cfg.base_url,
+            cfg.temperature,
+            cfg.structured_output,
+            # Tool definitions as the model sees them, and the version of their behavior
+            [
+                (tool.name, tool.description, tool.args)
+                for tool in (AVAILABLE_TOOLS[name] for name in cfg.enabled_tools)
+            ],
+            TOOLS_VERSION,
+            create_system_prompt(include_schema=not cfg.structured_output),
+            get_template_source(),
+        )
 
     # Create semaphore for rate limiting concurrent requests
     max_concurrent = cfg.max_concurrent_requests
@@ -64,17 +99,17 @@ async def run_benchmark(cfg: DictConfig):
 
     # Setup output file if configured
     output_path = cfg.results_output_path
-    write_lock = asyncio.Lock()
+    writer = None
     if output_path:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        # Clear existing file
-        output_path.write_text("")
+        # Opening the writer clears any existing file
+        writer = JsonlWriter(output_path)
         logger.info(f"Writing results to: {output_path}")
     logger.info(f"Processing {len(dataset)} cases with max concurrency: {max_concurrent}")
 
     # Create tasks for all cases
-    tasks = [process_case(agent, case, semaphore) for case in dataset]
+    tasks = [process_case(agent, case, semaphore, cache, run_fingerprint) for case in dataset]
 
     # Process with async progress bar and write results incrementally
     results = []
@@ -93,7 +128,7 @@ async def run_benchmark(cfg: DictConfig):
             logger.error(e)
             answers, scores = None, None
 
-        if output_path:
+        if writer is not None:
             eval_output = EvalOutput(
                 hadm_id=case.hadm_id,
                 ground_truth=case.ground_truth,
@@ -103,7 +138,12 @@ async def run_benchmark(cfg: DictConfig):
                 answers=answers,
                 scores=scores,
             )
-            await write_result_to_jsonl(output_path, eval_output.model_dump(), write_lock)
+            writer.write(eval_output.model_dump())
+
+    if writer is not None:
+        writer.close()
+    if cache is not None:
+        cache.close()
 
     logger.success(f"Benchmark complete - processed {len(results)} cases")
     if output_path:
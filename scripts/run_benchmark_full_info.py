@@ -9,6 +9,7 @@ import asyncio
 from pathlib import Path
 
 import hydra
+from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
 from loguru import logger
 from omegaconf import DictConfig
@@ -17,25 +18,32 @@ from tqdm.asyncio import tqdm
 
 from cdm.benchmark.data_models import BenchmarkOutputFullInfo, EvalOutputFullInfo, HadmCase
 from cdm.benchmark.utils import (
+    JsonlWriter,
     gather_all_info,
     load_cases,
-    write_result_to_jsonl,
 )
 from cdm.evaluators import get_evaluator
-from cdm.llms.agent import build_llm, run_llm_async
+from cdm.llms.agent import build_llm, build_structured_llm, run_llm_async
+from cdm.llms.cache import ResponseCache
 from cdm.prompts.context_control import control_context_length
-from cdm.prompts.gen_prompt_full_info import create_system_prompt, create_user_prompt
+from cdm.prompts.gen_prompt_full_info import (
+    create_system_prompt,
+    create_user_prompt,
+    get_template_source,
+)
 from cdm.prompts.text_utils import get_model_info_from_server, load_tokenizer
 
 
 async def process_case(
     llm: ChatOpenAI,
+    structured_llm: Runnable,
     system_prompt: str,
     case: HadmCase,
     semaphore: asyncio.Semaphore,
     tokenizer,
     max_context_length: int,
     cfg: DictConfig,
+    cache: ResponseCache | None = None,
 ) -> tuple[HadmCase, BenchmarkOutputFullInfo]:
     """Process a single case with semaphore-based rate limiting.
 
@@ -43,9 +51,31 @@ async def process_case(
     the model's context window using the MIMIC-CDM hierarchical summarization approach.
     """
     async with semaphore:
+        if not case.pathology:
+            logger.warning(f"No pathology for case: {case.hadm_id}")
+            return None
+
         # Gather all info (all imaging regions)
         patient_info_dict = gather_all_info(case)
 
+        # Look up the cache before context control so hits skip tokenization and summarization
+        cache_key = None
+        if cache is not None:
+            # The user template is part of the key, so editing it invalidates cached answers
+            cache_key = ResponseCache.make_prompt_key(
+                ResponseCache.make_key(system_prompt, get_template_source()),
+                patient_info_dict,
+                cfg.model_name,
+                llm.model_name,
+                llm.openai_api_base,
+                llm.temperature,
+                cfg.enable_summarization,
+                max_context_length,
+            )
+            cached_response = cache.get(cache_key)
+            if cached_response is not None:
+                return case, BenchmarkOutputFullInfo.model_validate_json(cached_response)
+
         # Apply context control if enabled
         if cfg.enable_summarization and tokenizer is not None:
             patient_info_dict = await control_context_length(
@@ -59,11 +89,8 @@ async def process_case(
             )
 
         user_prompt = create_user_prompt(patient_info_dict)
-        if not case.pathology:
-            logger.warning(f"No pathology for case: {case.hadm_id}")
-            return None
         try:
-            output = await run_llm_async(llm, system_prompt, user_prompt)
+            output = await run_llm_async(structured_llm, system_prompt, user_prompt)
         except BadRequestError as e:
             if "maximum context length" in str(e).lower():
                 logger.error(f"Skipping case {case.hadm_id} due to context length overflow.")
@@ -73,6 +100,8 @@ async def process_case(
         except LengthFinishReasonError:
             logger.error(f"Skipping case {case.hadm_id} due to model output token overflow")
             return None
+        if cache is not None:
+            cache.set(cache_key, output.model_dump_json())
         return case, output
 
 
@@ -80,6 +109,7 @@ async def run_benchmark(cfg: DictConfig):
     """Run full info benchmark with concurrent async processing."""
     dataset = load_cases(cfg.benchmark_data_path, cfg.num_cases)
     llm = build_llm(cfg.base_url, cfg.temperature)
+    structured_llm = build_structured_llm(llm)
 
     system_prompt = create_system_prompt()
 
@@ -99,24 +129,37 @@ async def run_benchmark(cfg: DictConfig):
     else:
         logger.info("Summarization disabled")
 
+    # Optional exact-match response cache so repeated runs skip identical LLM calls
+    cache = ResponseCache(cfg.response_cache_path) if cfg.response_cache_path else None
+
     # Create semaphore for rate limiting concurrent requests
     max_concurrent = cfg.max_concurrent_requests
     semaphore = asyncio.Semaphore(max_concurrent)
 
     # Setup output file if configured
     output_path = cfg.results_output_path
-    write_lock = asyncio.Lock()
+    writer = None
     if output_path:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        # Clear existing file
-        output_path.write_text("")
+        # Opening the writer clears any existing file
+        writer = JsonlWriter(output_path)
         logger.info(f"Writing results to: {output_path}")
     logger.info(f"Processing {len(dataset)} cases with max concurrency: {max_concurrent}")
 
     # Create tasks for all cases
     tasks = [
-        process_case(llm, system_prompt, case, semaphore, tokenizer, max_context_length, cfg)
+        process_case(
+            llm,
+            structured_llm,
+            system_prompt,
+            case,
+            semaphore,
+            tokenizer,
+            max_context_length,
+            cfg,
+            cache,
+        )
         for case in dataset
     ]
 
@@ -137,7 +180,7 @@ async def run_benchmark(cfg: DictConfig):
             logger.error(e)
             answers, scores = None, None
 
-        if output_path:
+        if writer is not None:
             eval_output = EvalOutputFullInfo(
                 hadm_id=case.hadm_id,
                 ground_truth=case.ground_truth,
@@ -146,7 +189,13 @@ async def run_benchmark(cfg: DictConfig):
                 answers=answers,
                 scores=scores,
             )
-            await write_result_to_jsonl(output_path, eval_output.model_dump(), write_lock)
+            writer.write(eval_output.model_dump())
+
+    if cache is not None:
+        cache.close()
+
+    if writer is not None:
+        writer.close()
 
     logger.success(f"Benchmark complete - processed {len(results)} cases")
     if output_path:
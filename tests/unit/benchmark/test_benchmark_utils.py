@@ -0,0 +1,119 @@
+"""Unit tests for benchmark utils - dataset loading and result writing."""
+
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from cdm.benchmark import utils
+from cdm.benchmark.utils import JsonlWriter, load_cases
+
+
+class TestLoadCases:
+    """Test suite for load_cases function."""
+
+    @pytest.fixture
+    def benchmark_path(self, tmp_path):
+        """Write a small benchmark file with three cases."""
+        cases = [
+            {
+                "hadm_id": hadm_id,
+                "patient_history": f"History {hadm_id}",
+                "lab_results": [
+                    {"itemid": 51301, "test_name": "WBC", "charttime": "2150-01-01T08:00:00"}
+                ],
+            }
+            for hadm_id in (1, 2, 3)
+        ]
+        path = tmp_path / "benchmark.json"
+        path.write_text(json.dumps({"cases": cases}))
+        return path
+
+    def test_load_all_cases(self, benchmark_path):
+        """Test that all cases are loaded when num_cases is None."""
+        dataset = load_cases(benchmark_path)
+        assert [case.hadm_id for case in dataset] == [1, 2, 3]
+
+    def test_load_subset_of_cases(self, benchmark_path):
+        """Test that only the first num_cases cases are loaded."""
+        dataset = load_cases(benchmark_path, num_cases=2)
+        assert [case.hadm_id for case in dataset] == [1, 2]
+
+    def test_subset_of_pretty_printed_file(self, tmp_path):
+        """Test subset loading on an indented file, as written by the benchmark scripts."""
+        path = tmp_path / "benchmark.json"
+        path.write_text(json.dumps({"cases": [{"hadm_id": 1}, {"hadm_id": 2}]}, indent=2))
+        dataset = load_cases(path, num_cases=1)
+        assert [case.hadm_id for case in dataset] == [1]
+
+    def test_subset_spanning_decode_windows(self, tmp_path, monkeypatch):
+        """Test subset loading when cases span several decode windows and multi-byte text."""
+        monkeypatch.setattr(utils, "_INITIAL_DECODE_WINDOW", 7)
+        cases = [
+            {"hadm_id": i, "patient_history": "Schmerz im Oberbauch, Übelkeit"} for i in range(5)
+        ]
+        path = tmp_path / "benchmark.json"
+        path.write_text(json.dumps({"cases": cases}, ensure_ascii=False), encoding="utf-8")
+
+        dataset = load_cases(path, num_cases=3)
+        assert [case.hadm_id for case in dataset] == [0, 1, 2]
+        assert dataset.cases[2].patient_history == "Schmerz im Oberbauch, Übelkeit"
+
+    def test_num_cases_larger_than_dataset(self, benchmark_path):
+        """Test that requesting more cases than available returns all cases."""
+        dataset = load_cases(benchmark_path, num_cases=10)
+        assert [case.hadm_id for case in dataset] == [1, 2, 3]
+
+    def test_zero_cases(self, benchmark_path):
+        """Test that num_cases=0 returns an empty dataset."""
+        assert len(load_cases(benchmark_path, num_cases=0)) == 0
+
+    def test_negative_num_cases(self, benchmark_path):
+        """Test that a negative num_cases drops cases from the end."""
+        dataset = load_cases(benchmark_path, num_cases=-1)
+        assert [case.hadm_id for case in dataset] == [1, 2]
+
+    @pytest.mark.parametrize("num_cases", [None, 1])
+    def test_empty_file_raises(self, tmp_path, num_cases):
+        """Test that an empty file raises the same validation error with and without a subset."""
+        path = tmp_path / "benchmark.json"
+        path.write_bytes(b"")
+        with pytest.raises(ValidationError, match="EOF while parsing"):
+            load_cases(path, num_cases=num_cases)
+
+    def test_subset_matches_full_load(self, benchmark_path):
+        """Test that subset loading validates cases the same way as a full load."""
+        subset = load_cases(benchmark_path, num_cases=1)
+        full = load_cases(benchmark_path)
+        assert subset.cases[0] == full.cases[0]
+
+
+class TestJsonlWriter:
+    """Test suite for JsonlWriter class."""
+
+    def test_writes_one_line_per_result(self, tmp_path):
+        """Test that each result is written as a separate JSON line."""
+        path = tmp_path / "results.jsonl"
+        writer = JsonlWriter(path)
+        writer.write({"hadm_id": 1, "scores": {"Diagnosis": 1}})
+        writer.write({"hadm_id": 2, "scores": {"Diagnosis": 0}})
+        writer.close()
+
+        lines = path.read_text().splitlines()
+        assert [json.loads(line)["hadm_id"] for line in lines] == [1, 2]
+
+    def test_results_visible_before_close(self, tmp_path):
+        """Test that results are flushed to disk as they are written."""
+        path = tmp_path / "results.jsonl"
+        writer = JsonlWriter(path)
+        writer.write({"hadm_id": 1})
+        assert json.loads(path.read_text()) == {"hadm_id": 1}
+        writer.close()
+
+    def test_truncates_existing_file(self, tmp_path):
+        """Test that results from a previous run are cleared."""
+        path = tmp_path / "results.jsonl"
+        path.write_text('{"hadm_id": 0}\n')
+        writer = JsonlWriter(path)
+        writer.close()
+        assert path.read_text() == ""
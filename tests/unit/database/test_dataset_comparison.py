@@ -0,0 +1,310 @@
+"""Unit tests for dataset_comparison - CDMv1 validation of the benchmark dataset."""
+
+import copy
+import json
+import sys
+
+import pytest
+
+from cdm.database.analysis import dataset_comparison
+from cdm.database.analysis.dataset_comparison import (
+    _compare_case,
+    _lab_values_match,
+    _load_cdm_v1_file,
+    _render_cases,
+    compare_datasets,
+    main,
+)
+
+
+class TestCompareDatasets:
+    """Test suite for compare_datasets function."""
+
+    @pytest.fixture
+    def cdm_v1_dir(self, tmp_path):
+        """Write a CDMv1 directory with one appendicitis case."""
+        cdm_v1_dir = tmp_path / "cdm_v1"
+        cdm_v1_dir.mkdir()
+        cdm_cases = {
+            "1": {
+                "Patient History": "RLQ pain since yesterday",
+                "Physical Examination": "Tender right lower quadrant",
+                "Laboratory Tests": {"51301": "12.0 K/uL", "50862": "4.1 g/dL"},
+                "Radiology": [
+                    {
+                        "Note ID": "1-RR-1",
+                        "Modality": "CT",
+                        "Region": "Abdomen",
+                        "Report": "Dilated appendix",
+                    }
+                ],
+                "Microbiology": {"90201": "Escherichia coli, Enterococcus"},
+                "Discharge Diagnosis": "Acute ___ appendicitis",
+                "Procedures ICD9 Title": ["Laparoscopic appendectomy"],
+            }
+        }
+        (cdm_v1_dir / "appendicitis_hadm_info_first_diag.json").write_text(json.dumps(cdm_cases))
+        return cdm_v1_dir
+
+    @pytest.fixture
+    def dataset_path(self, tmp_path):
+        """Write a benchmark dataset with one CDMv1 case and one unknown case."""
+        cases = [
+            {
+                "hadm_id": 1,
+                "patient_history": "RLQ pain since yesterday",
+                "physical_exam_text": "Tender right lower quadrant",
+                "demographics": {"age": 30, "gender": "F"},
+                "ground_truth": {
+                    "primary_diagnosis": ["Acute appendicitis"],
+                    "treatments": [{"title": "Laparoscopic appendectomy"}],
+                },
+                "lab_results": [
+                    {"itemid": 51301, "value": "12 K/uL"},
+                    {"itemid": 50862, "value": "3.9 g/dL"},
+                    {"itemid": 50912, "value": "1.0"},
+                ],
+                "radiology_reports": [
+                    {
+                        "note_id": "1-RR-1",
+                        "modality": "CT",
+                        "region": "Abdomen",
+                        "text": "Dilated appendix",
+                    }
+                ],
+                "microbiology_events": [
+                    {"organism_name": "ENTEROCOCCUS, ESCHERICHIA COLI", "test_itemid": 90201}
+                ],
+            },
+            {"hadm_id": 2, "ground_truth": {"primary_diagnosis": ["Cholecystitis"]}},
+        ]
+        path = tmp_path / "benchmark.json"
+        path.write_text(json.dumps({"cases": cases}))
+        return path
+
+    def test_compare_matching_case(self, dataset_path, cdm_v1_dir, tmp_path):
+        """Test that a case present in CDMv1 is compared field by field."""
+        results = compare_datasets(dataset_path, cdm_v1_dir, tmp_path / "summary.txt")
+        comparison = results[0]
+
+        assert comparison["found"] is True
+        assert comparison["history_similarity"] == 1.0
+        assert comparison["exam_similarity"] == 1.0
+        assert comparison["lab_overlap"] == 2
+        assert comparison["lab_extra_itemids"] == ["50912"]
+        assert comparison["lab_value_matches"] == 1
+        assert comparison["lab_value_mismatches"] == 1
+        assert comparison["radiology_text_similarity"] == 1.0
+        assert comparison["micro_organism_overlap"] == 1
+        assert comparison["diagnosis_in_discharge"] is True
+        assert comparison["procedures_exact_matches"] == 1
+
+    def test_compare_unknown_case(self, dataset_path, cdm_v1_dir, tmp_path):
+        """Test that a case missing from CDMv1 is reported as not found."""
+        results = compare_datasets(dataset_path, cdm_v1_dir, tmp_path / "summary.txt")
+        assert results[1] == {"hadm_id": "2", "found": False, "diagnosis": ["Cholecystitis"]}
+
+    def test_summary_written(self, dataset_path, cdm_v1_dir, tmp_path):
+        """Test that the summary report is written to the output file."""
+        output_file = tmp_path / "summary.txt"
+        compare_datasets(dataset_path, cdm_v1_dir, output_file)
+
+        summary = output_file.read_text()
+        assert "Found in CDMv1: 1" in summary
+        assert "Not found in CDMv1: 1" in summary
+
+    def test_summary_without_found_cases(self, cdm_v1_dir, tmp_path):
+        """Test that the summary skips the per-field sections when no case is found."""
+        path = tmp_path / "benchmark.json"
+        path.write_text(json.dumps({"cases": [{"hadm_id": 2}]}))
+        output_file = tmp_path / "summary.txt"
+        compare_datasets(path, cdm_v1_dir, output_file)
+
+        summary = output_file.read_text()
+        assert "Found in CDMv1: 0" in summary
+        assert "Average similarities" not in summary
+
+    def test_unchanged_inputs_reuse_results(self, dataset_path, cdm_v1_dir, tmp_path, monkeypatch):
+        """Test that comparing unchanged files again does not reload them."""
+        first = compare_datasets(dataset_path, cdm_v1_dir, tmp_path / "summary.txt")
+
+        def fail_load(path):
+            raise AssertionError(f"{path} was loaded again")
+
+        monkeypatch.setattr(dataset_comparison, "_load_json", fail_load)
+        second = compare_datasets(dataset_path, cdm_v1_dir, tmp_path / "summary.txt")
+        assert second == first
+
+    def test_modified_results_do_not_affect_later_calls(self, dataset_path, cdm_v1_dir, tmp_path):
+        """Test that modifying nested values of returned results leaves the cache unchanged."""
+        output_file = tmp_path / "summary.txt"
+        first = compare_datasets(dataset_path, cdm_v1_dir, output_file)
+        first[0]["lab_extra_itemids"].append("POISON")
+        first[0]["lab_value_mismatch_details"][0]["new_value"] = "POISON"
+
+        second = compare_datasets(dataset_path, cdm_v1_dir, output_file)
+        assert second[0]["lab_extra_itemids"] == ["50912"]
+        assert second[0]["lab_value_mismatch_details"][0]["new_value"] != "POISON"
+        assert "POISON" not in output_file.read_text()
+
+    def test_changed_dataset_is_compared_again(self, dataset_path, cdm_v1_dir, tmp_path):
+        """Test that modifying the dataset file invalidates memoized results."""
+        compare_datasets(dataset_path, cdm_v1_dir, tmp_path / "summary.txt")
+        dataset_path.write_text(json.dumps({"cases": [{"hadm_id": 3}]}))
+
+        results = compare_datasets(dataset_path, cdm_v1_dir, tmp_path / "summary.txt")
+        assert [r["hadm_id"] for r in results] == ["3"]
+
+    def test_worker_pool_matches_serial(self, cdm_v1_dir, tmp_path, monkeypatch):
+        """Test that comparing in worker processes gives the serial results in order."""
+        monkeypatch.setattr(dataset_comparison, "_MIN_PARALLEL_CASES", 0)
+        cases = [
+            {"hadm_id": hadm_id, "patient_history": "RLQ pain", "ground_truth": {}}
+            for hadm_id in (3, 1, 2, 1)
+        ]
+        path = tmp_path / "benchmark.json"
+        path.write_text(json.dumps({"cases": cases}))
+        output_file = tmp_path / "summary.txt"
+
+        serial = compare_datasets(path, cdm_v1_dir, output_file, num_workers=1)
+        parallel = compare_datasets(path, cdm_v1_dir, output_file, num_workers=2)
+        assert parallel == serial
+        assert [r["hadm_id"] for r in parallel] == ["3", "1", "2", "1"]
+
+    def test_missing_dataset_raises(self, cdm_v1_dir, tmp_path):
+        """Test that a missing dataset file raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            compare_datasets(tmp_path / "missing.json", cdm_v1_dir, tmp_path / "summary.txt")
+
+    def test_invalid_dataset_raises(self, cdm_v1_dir, tmp_path):
+        """Test that a malformed dataset file raises JSONDecodeError."""
+        path = tmp_path / "benchmark.json"
+        path.write_text('{"cases": [')
+        with pytest.raises(json.JSONDecodeError):
+            compare_datasets(path, cdm_v1_dir, tmp_path / "summary.txt")
+
+
+class TestMain:
+    """Test suite for main function."""
+
+    @pytest.mark.parametrize("name", ["missing.json", "benchmark.json/missing.json"])
+    def test_dataset_not_found(self, name, tmp_path, monkeypatch, capsys):
+        """Test that a missing or invalid dataset path prints an error and returns 1."""
+        (tmp_path / "benchmark.json").write_text("{}")
+        dataset = str(tmp_path / name)
+        monkeypatch.setattr(sys, "argv", ["dataset_comparison.py", dataset])
+
+        assert main() == 1
+        assert f"Error: Dataset file not found: {dataset}" in capsys.readouterr().out
+
+
+class TestCompareCase:
+    """Test suite for _compare_case function."""
+
+    def test_micro_extra_values_use_substring_matching(self):
+        """Test that new results contained in a CDMv1 result are not reported as extra."""
+        cdm_v1_data = {"1": {"Microbiology": {"90201": "Escherichia coli, >100,000 CFU/ml"}}}
+        case = {
+            "hadm_id": 1,
+            "microbiology_events": [
+                {"organism_name": "ESCHERICHIA COLI"},
+                {"organism_name": "STAPHYLOCOCCUS AUREUS"},
+            ],
+        }
+        comparison = _compare_case(case, cdm_v1_data)
+
+        assert comparison["micro_organism_extra"] == 1
+        assert comparison["micro_extra_values"] == ["staphylococcus aureus"]
+
+    def test_cdm_v1_data_not_modified(self):
+        """Test that comparing a case leaves the CDMv1 data unchanged."""
+        cdm_v1_data = {
+            "1": {
+                "Patient History": "RLQ pain",
+                "Radiology": [{"Note ID": "1-RR-1", "Report": "Dilated appendix"}],
+            }
+        }
+        expected = copy.deepcopy(cdm_v1_data)
+        _compare_case({"hadm_id": 1, "patient_history": "RLQ pain"}, cdm_v1_data)
+
+        assert cdm_v1_data == expected
+
+
+class TestRenderCases:
+    """Test suite for _render_cases function."""
+
+    def test_all_cases_listed(self):
+        """Test that a fully listed section has no trailing count."""
+        section = _render_cases("Flagged", [{"hadm_id": "1"}], 1, lambda r: f"    - {r['hadm_id']}")
+        assert section == "\n  Flagged (1):\n    - 1"
+
+    def test_unlisted_cases_counted(self):
+        """Test that cases beyond the listed ones are summarized by count."""
+        section = _render_cases("Flagged", [{"hadm_id": "1"}], 3, lambda r: f"    - {r['hadm_id']}")
+        assert section.endswith("    - 1\n    ... and 2 more")
+
+
+class TestLabValuesMatch:
+    """Test suite for _lab_values_match function."""
+
+    @pytest.mark.parametrize(
+        "cdm_value, new_value",
+        [
+            ("10.0", "10"),
+            ("12.0 K/uL", "12 k/ul"),
+            ("12 K/uL", "12"),
+            (" NEG ", "neg"),
+            ("<5", "<5"),
+            ("1.5e2", "150"),
+        ],
+    )
+    def test_matching_values(self, cdm_value, new_value):
+        """Test that formatting, case and unit-less values still match."""
+        assert _lab_values_match(cdm_value, new_value)
+
+    @pytest.mark.parametrize(
+        "cdm_value, new_value",
+        [
+            ("10", "10.5"),
+            ("12 K/uL", "12 mg/dL"),
+            ("NEG", "POS"),
+            ("10", "ten"),
+            ("nan", "nan"),
+            ("inf", "inf"),
+        ],
+    )
+    def test_mismatching_values(self, cdm_value, new_value):
+        """Test that different numbers, units or strings do not match.
+
+        "nan" and "inf" parse as floats whose difference is not below the tolerance, so
+        like in the original comparison they do not match even when identical.
+        """
+        assert not _lab_values_match(cdm_value, new_value)
+
+
+class TestLoadCdmV1File:
+    """Test suite for _load_cdm_v1_file function."""
+
+    @pytest.fixture
+    def cdm_v1_file(self, tmp_path):
+        """Write a CDMv1 file with one case."""
+        path = tmp_path / "appendicitis_hadm_info_first_diag.json"
+        path.write_text(json.dumps({"1": {"Discharge Diagnosis": "Appendicitis"}}))
+        return path
+
+    def test_load_file(self, cdm_v1_file):
+        """Test that the cases are returned keyed by hadm_id."""
+        assert _load_cdm_v1_file(cdm_v1_file) == {"1": {"Discharge Diagnosis": "Appendicitis"}}
+
+    def test_loads_are_independent(self, cdm_v1_file):
+        """Test that loading a file twice gives equal but independent cases."""
+        first = _load_cdm_v1_file(cdm_v1_file)
+        second = _load_cdm_v1_file(cdm_v1_file)
+        assert second == first
+
+        first["1"]["Discharge Diagnosis"] = "Cholecystitis"
+        assert second["1"]["Discharge Diagnosis"] == "Appendicitis"
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing file returns None."""
+        assert _load_cdm_v1_file(tmp_path / "missing.json") is None
@@ -0,0 +1,32 @@
+"""Unit tests for queries.py - database getters with a mocked cursor."""
+
+from unittest.mock import Mock
+
+import pytest
+
+from cdm.database.queries import get_demographics_bulk
+
+
+class TestGetDemographicsBulk:
+    """Test suite for get_demographics_bulk function."""
+
+    @pytest.fixture
+    def mock_cursor(self):
+        """Create a mock cursor returning demographics for one of two admissions."""
+        cursor = Mock()
+        cursor.fetchall.return_value = [(1, 30, "F")]
+        return cursor
+
+    def test_single_query_for_all_ids(self, mock_cursor):
+        """Test that all hadm_ids are passed as one ANY(%s) parameter."""
+        get_demographics_bulk(mock_cursor, [1, 2])
+
+        mock_cursor.execute.assert_called_once()
+        query, params = mock_cursor.execute.call_args.args
+        assert "ANY(%s)" in query
+        assert params == ([1, 2],)
+
+    def test_missing_id_is_absent(self, mock_cursor):
+        """Test that an admission without demographics is missing from the result."""
+        demographics = get_demographics_bulk(mock_cursor, [1, 2])
+        assert demographics == {1: {"age": 30, "gender": "F"}}
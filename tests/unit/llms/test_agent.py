@@ -3,8 +3,9 @@
 from unittest.mock import Mock
 
 import pytest
+from pydantic import ValidationError
 
-from cdm.llms.agent import build_agent
+from cdm.llms.agent import build_agent, parse_agent_output
 
 
 class TestBuildAgent:
@@ -47,6 +48,11 @@ class TestBuildAgent:
         agent = build_agent(mock_llm, [])
         assert agent is not None
 
+    def test_build_agent_with_structured_output(self, mock_llm, sample_case):
+        """Test that build_agent works with schema-constrained final output."""
+        agent = build_agent(mock_llm, ["physical_exam"], structured_output=True)
+        assert agent is not None
+
     def test_build_agent_raises_error_on_invalid_tool(self, mock_llm, sample_case):
         """Test that build_agent raises ValueError for invalid tool names."""
         invalid_tools = ["physical_exam", "invalid_tool"]
@@ -60,3 +66,40 @@ class TestBuildAgent:
 
         with pytest.raises(ValueError):
             build_agent(mock_llm, invalid_tools)
+
+
+class TestParseAgentOutput:
+    """Test suite for parse_agent_output function."""
+
+    @pytest.fixture
+    def output_json(self):
+        """Create a valid BenchmarkOutputCDM JSON string."""
+        return (
+            '{"thought": "RLQ pain", "final_diagnosis": "Appendicitis", "treatment": ["Surgery"]}'
+        )
+
+    def test_parse_plain_json(self, output_json):
+        """Test that plain JSON is parsed directly."""
+        output = parse_agent_output(output_json)
+        assert output.final_diagnosis == "Appendicitis"
+        assert output.treatment == ["Surgery"]
+
+    def test_parse_markdown_json(self, output_json):
+        """Test that JSON wrapped in a markdown code block is parsed."""
+        output = parse_agent_output(f"```json\n{output_json}\n```")
+        assert output.final_diagnosis == "Appendicitis"
+
+    def test_parse_json_with_surrounding_prose(self, output_json):
+        """Test that prose before and after the JSON object is ignored."""
+        output = parse_agent_output(f"Here is my answer:\n{output_json}\nHope this helps.")
+        assert output.final_diagnosis == "Appendicitis"
+
+    def test_parse_json_with_trailing_braces(self, output_json):
+        """Test that braces in text after the JSON object do not break parsing."""
+        output = parse_agent_output(f"{output_json}\nNote: monitor vitals {{q4h}}.")
+        assert output.final_diagnosis == "Appendicitis"
+
+    def test_parse_invalid_output_raises(self):
+        """Test that output without a valid JSON object raises ValidationError."""
+        with pytest.raises(ValidationError):
+            parse_agent_output("I am not sure about the diagnosis.")
@@ -0,0 +1,62 @@
+"""Unit tests for cache.py - exact-match LLM response cache."""
+
+import pytest
+
+from cdm.llms.cache import ResponseCache
+
+
+class TestResponseCache:
+    """Test suite for ResponseCache."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Create a cache in a temporary directory."""
+        cache = ResponseCache(tmp_path / "cache.sqlite")
+        yield cache
+        cache.close()
+
+    def test_miss_returns_none(self, cache):
+        """Test that an unknown key returns None."""
+        assert cache.get(ResponseCache.make_key("model", "prompt")) is None
+
+    def test_set_then_get(self, cache):
+        """Test that a stored response is returned for the same key."""
+        key = ResponseCache.make_key("model", 0.0, "system", "user")
+        cache.set(key, '{"diagnosis": "Appendicitis"}')
+        assert cache.get(key) == '{"diagnosis": "Appendicitis"}'
+
+    def test_key_depends_on_all_parts(self):
+        """Test that changing any part of the request changes the key."""
+        key = ResponseCache.make_key("model", 0.0, "system", "user")
+        assert key == ResponseCache.make_key("model", 0.0, "system", "user")
+        assert key != ResponseCache.make_key("model", 0.7, "system", "user")
+        assert key != ResponseCache.make_key("model", 0.0, "system", "other user")
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that responses survive reopening the cache file."""
+        key = ResponseCache.make_key("model", "prompt")
+        cache = ResponseCache(tmp_path / "cache.sqlite")
+        cache.set(key, "{}")
+        cache.close()
+
+        reopened = ResponseCache(tmp_path / "cache.sqlite")
+        assert reopened.get(key) == "{}"
+        reopened.close()
+
+    def test_prompt_key_ignores_slot_order(self):
+        """Test that the order of the slots does not change the key."""
+        key = ResponseCache.make_prompt_key("system", {"hpi": "Pain in RLQ.", "pe": "Tender"}, "m")
+        assert key == ResponseCache.make_prompt_key(
+            "system", {"pe": "Tender", "hpi": "Pain in RLQ."}, "m"
+        )
+
+    def test_prompt_key_keeps_slot_whitespace(self):
+        """Test that slot values differing only in whitespace get different keys."""
+        key = ResponseCache.make_prompt_key("system", {"hpi": "Pain in RLQ."}, "m")
+        assert key != ResponseCache.make_prompt_key("system", {"hpi": "Pain in  RLQ.\n"}, "m")
+
+    def test_prompt_key_depends_on_skeleton_and_slots(self):
+        """Test that changing the skeleton or any slot value changes the key."""
+        key = ResponseCache.make_prompt_key("system", {"hpi": "Pain in RLQ."}, "m")
+        assert key != ResponseCache.make_prompt_key("other", {"hpi": "Pain in RLQ."}, "m")
+        assert key != ResponseCache.make_prompt_key("system", {"hpi": "Pain in LLQ."}, "m")